@@ -0,0 +1,55 @@
+package com.ericsson.nms.litp.taf.test_cases;
+
+/*------------------------------------------------------------------------------
+ *******************************************************************************
+ * COPYRIGHT Ericsson 2015
+ *
+ * The copyright to the computer program(s) herein is the property of
+ * Ericsson Inc. The programs may be used and/or copied only with written
+ * permission from Ericsson Inc. or in accordance with the terms and
+ * conditions stipulated in the agreement/contract under which the
+ * program(s) have been supplied.
+ *******************************************************************************
+ *----------------------------------------------------------------------------*/
+
+import java.lang.reflect.Constructor;
+import java.lang.reflect.Method;
+
+import org.testng.IAnnotationTransformer2;
+import org.testng.annotations.IConfigurationAnnotation;
+import org.testng.annotations.IDataProviderAnnotation;
+import org.testng.annotations.IFactoryAnnotation;
+import org.testng.annotations.ITestAnnotation;
+
+// Listener for suites of read only checks. It makes the data providers
+// behind @DataDriven hand out their rows in parallel, with as many threads
+// as the data-provider-thread-count of the suite. Each row is still its
+// own test with its own result, and PythonWorkerTestRunner only lets rows
+// marked parallel_safe run alongside each other, and only as many of them
+// as -Dlitpsan.parallel.workers allows, one unless it is set.
+public class ParallelDataProviders implements IAnnotationTransformer2 {
+
+	@Override
+	public void transform(IDataProviderAnnotation annotation, Method method) {
+		annotation.setParallel(true);
+	}
+
+	@Override
+	public void transform(ITestAnnotation annotation,
+			@SuppressWarnings("rawtypes") Class testClass,
+			@SuppressWarnings("rawtypes") Constructor testConstructor,
+			Method testMethod) {
+	}
+
+	@Override
+	public void transform(IConfigurationAnnotation annotation,
+			@SuppressWarnings("rawtypes") Class testClass,
+			@SuppressWarnings("rawtypes") Constructor testConstructor,
+			Method testMethod) {
+	}
+
+	@Override
+	public void transform(IFactoryAnnotation annotation, Method method) {
+	}
+
+}
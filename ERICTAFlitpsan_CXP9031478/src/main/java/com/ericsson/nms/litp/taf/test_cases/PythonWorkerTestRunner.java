@@ -0,0 +1,91 @@
+package com.ericsson.nms.litp.taf.test_cases;
+
+/*------------------------------------------------------------------------------
+ *******************************************************************************
+ * COPYRIGHT Ericsson 2015
+ *
+ * The copyright to the computer program(s) herein is the property of
+ * Ericsson Inc. The programs may be used and/or copied only with written
+ * permission from Ericsson Inc. or in accordance with the terms and
+ * conditions stipulated in the agreement/contract under which the
+ * program(s) have been supplied.
+ *******************************************************************************
+ *----------------------------------------------------------------------------*/
+
+import java.util.Collections;
+import java.util.LinkedHashSet;
+import java.util.Set;
+import java.util.concurrent.Semaphore;
+
+import org.testng.annotations.*;
+
+import utils.PtafTestRunner;
+
+public abstract class PythonWorkerTestRunner extends PtafTestRunner {
+
+	// Script in each scripts directory which hands a test script to the
+	// long lived python worker of that directory on the MS
+	private static final String WORKER_CLIENT = "run_in_worker";
+
+	// Scripts run at once by a suite whose data driven rows run in
+	// parallel, set with -Dlitpsan.parallel.workers. Rows running in
+	// parallel call executePythonScript on the same runner instance at
+	// once, which PtafTestRunner is not known to be safe for, so by
+	// default every row still runs on its own
+	private static final int PARALLEL_WORKERS = Math.max(1,
+			Integer.getInteger("litpsan.parallel.workers", 1));
+
+	// A parallel safe script holds one slot while it runs, any other
+	// script holds them all, so it never runs alongside another script
+	private static final Semaphore scriptSlots = new Semaphore(
+			PARALLEL_WORKERS, true);
+
+	// Scripts directories with a worker started by this class
+	private Set<String> workerDirs = Collections
+			.synchronizedSet(new LinkedHashSet<String>());
+
+	// Run a test script in the python worker of its scripts directory, so
+	// it starts with ptaf and infra_utils already imported. The worker is
+	// started by the first script of the directory. The script runs on
+	// its own, whether or not the suite runs its rows in parallel.
+	protected void executePythonScriptInWorker(String scriptsDir,
+			String test_id, String vargs) {
+
+		executePythonScriptInWorker(scriptsDir, test_id, vargs, "false");
+	}
+
+	// As above, except that a script whose parallel_safe column is true
+	// only reads from the deployment and may run alongside other parallel
+	// safe scripts
+	protected void executePythonScriptInWorker(String scriptsDir,
+			String test_id, String vargs, String parallel_safe) {
+
+		int slots = Boolean.parseBoolean(parallel_safe) ? 1
+				: PARALLEL_WORKERS;
+		workerDirs.add(scriptsDir);
+		String args = test_id;
+		if (vargs != null && !vargs.trim().isEmpty()) {
+			args = args + " " + vargs;
+		}
+		scriptSlots.acquireUninterruptibly(slots);
+		try {
+			executePythonScript(scriptsDir, WORKER_CLIENT, args);
+		} finally {
+			scriptSlots.release(slots);
+		}
+	}
+
+	// Stop the workers once every test of the class has run, rather than
+	// leave them to stop when idle
+	@AfterClass(alwaysRun = true)
+	public void stopPythonWorkers() {
+
+		synchronized (workerDirs) {
+			for (String scriptsDir : workerDirs) {
+				executePythonScript(scriptsDir, WORKER_CLIENT, "--stop");
+			}
+			workerDirs.clear();
+		}
+	}
+
+}
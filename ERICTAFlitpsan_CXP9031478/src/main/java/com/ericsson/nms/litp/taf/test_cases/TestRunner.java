@@ -14,26 +14,36 @@ package com.ericsson.nms.litp.taf.test_cases;
 
 import org.testng.annotations.*;
 
-import utils.PtafTestRunner;
-
 import com.ericsson.cifwk.taf.*;
 import com.ericsson.cifwk.taf.annotations.*;
 
-public class TestRunner extends PtafTestRunner {
+public class TestRunner extends PythonWorkerTestRunner {
 
 	// Location of the python test scripts
 	private String scriptsDir = "pdc_checks";
-	
+
+	// Script which discards the state a previous run left on the MS
+	private String resetScript = "infra_tst_pdc_reset";
+
+	// Runs on its own before any row of the csv, so no check reads state
+	// left by a previous run whatever order the rows run in
+	@BeforeClass
+	public void reset_pdc_state() {
+
+		executePythonScriptInWorker(scriptsDir, resetScript, "");
+	}
 
 	// Supply the csv containing the names of the python scripts to be copied to
-	// MS
+	// MS, rows marked parallel_safe may run at the same time as each other
 	@DataDriven(name = "post_deployment_checks_test_scripts")
 	@Test
 	@Context(context = { Context.CLI })
 	public void run_scripts3(@TestId @Input("test_id") String test_id,
-			@Input("vargs") String vargs) {
+			@Input("vargs") String vargs,
+			@Input("parallel_safe") String parallel_safe) {
 
-		executePythonScript(scriptsDir, test_id, vargs);
+		executePythonScriptInWorker(scriptsDir, test_id, vargs,
+				parallel_safe);
 	}
 
 }
@@ -13,13 +13,12 @@ package com.ericsson.nms.litp.taf.test_cases;
  *----------------------------------------------------------------------------*/
 
 import org.testng.annotations.*;
-import utils.PtafTestRunner;
 import com.ericsson.cifwk.taf.*;
 import com.ericsson.cifwk.taf.annotations.*;
 
 
 
-public class TestRunner2 extends PtafTestRunner {
+public class TestRunner2 extends PythonWorkerTestRunner {
 
 	
 	// Location of the python test scripts
@@ -31,7 +30,7 @@ public class TestRunner2 extends PtafTestRunner {
 	@Context(context = { Context.CLI })
 	public void run_scripts3(@TestId @Input("test_id") String test_id,
 			@Input("vargs") String vargs) {
-		executePythonScript(scriptsDir, test_id, vargs);
+		executePythonScriptInWorker(scriptsDir, test_id, vargs);
 	}
 	
 
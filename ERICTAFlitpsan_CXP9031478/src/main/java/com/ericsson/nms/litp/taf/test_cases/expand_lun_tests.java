@@ -13,12 +13,10 @@ package com.ericsson.nms.litp.taf.test_cases;
  *----------------------------------------------------------------------------*/
 
 import org.testng.annotations.*;
-import utils.PtafTestRunner;
-
 import com.ericsson.cifwk.taf.*;
 import com.ericsson.cifwk.taf.annotations.*;
 
-public class expand_lun_tests extends PtafTestRunner {
+public class expand_lun_tests extends PythonWorkerTestRunner {
 
 	// Location of the python test scripts
 	private String scriptsDir = "add_expand_lun_tests";
@@ -31,7 +29,7 @@ public class expand_lun_tests extends PtafTestRunner {
 	public void run_scripts3(@TestId @Input("test_id") String test_id,
 			@Input("vargs") String vargs) {
 
-		executePythonScript(scriptsDir, test_id, vargs);
+		executePythonScriptInWorker(scriptsDir, test_id, vargs);
 	}
 
 }
@@ -0,0 +1,50 @@
+package com.ericsson.nms.litp.taf.test_cases;
+
+/*------------------------------------------------------------------------------
+ *******************************************************************************
+ * COPYRIGHT Ericsson 2015
+ *
+ * The copyright to the computer program(s) herein is the property of
+ * Ericsson Inc. The programs may be used and/or copied only with written
+ * permission from Ericsson Inc. or in accordance with the terms and
+ * conditions stipulated in the agreement/contract under which the
+ * program(s) have been supplied.
+ *******************************************************************************
+ *----------------------------------------------------------------------------*/
+
+
+import org.testng.annotations.*;
+
+import com.ericsson.cifwk.taf.*;
+import com.ericsson.cifwk.taf.annotations.*;
+
+public class pdc_engine extends PythonWorkerTestRunner {
+
+	// Location of the python test scripts
+	private String scriptsDir = "pdc_checks";
+
+	// Script which runs every post deployment check in a single process
+	private String engineScript = "infra_tst_pdc_engine";
+
+	// Load the LITP model and SAN inventory once and run every check
+	// against them, the outcome of each check is kept on the MS
+	@Test
+	@Context(context = { Context.CLI })
+	public void run_engine() {
+
+		executePythonScriptInWorker(scriptsDir, engineScript, "");
+	}
+
+	// Supply the csv containing the names of the checks run by the engine,
+	// each check is reported as its own test
+	@DataDriven(name = "pdc_engine_checks")
+	@Test(dependsOnMethods = { "run_engine" }, alwaysRun = true)
+	@Context(context = { Context.CLI })
+	public void run_checks(@TestId @Input("test_id") String test_id,
+			@Input("vargs") String vargs) {
+
+		executePythonScriptInWorker(scriptsDir, engineScript,
+				"--check " + test_id);
+	}
+
+}
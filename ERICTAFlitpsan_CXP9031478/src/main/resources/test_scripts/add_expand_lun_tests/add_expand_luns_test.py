@@ -4,11 +4,22 @@ from ptaf.utils.cmd_utils import CMDUtils
 from infra_utils.utils.enm_helpers import Model
 from ptaf.utils.litp_cmd_utils import LitpUtils
 from infra_utils.utils.san_utils import SanClient
+from plan_utils import PlanWaiterMixin
+from model_batch import ModelBatch
+from parallel import DEFAULT_WORKERS, run_parallel
+import decimal
 import re
 import time
 
+# Model size units as a number of the unit per GB
+UNITS_PER_GB = {"G": 1, "M": 1024, "K": 1048576}
 
-class AddExpandTest(SanTest):
+# Lists the SCSI device links of a node, once for all the LUNs on it
+SCSI_DEVICES_CMD = "ls -l /dev/disk/*/* | grep scsi"
+SCSI_ID_PATTERN = re.compile(r'scsi-([0-9a-f]+)')
+
+
+class AddExpandTest(PlanWaiterMixin, SanTest):
 
     """
     A generic class with some functionality
@@ -23,8 +34,9 @@ class AddExpandTest(SanTest):
         super(AddExpandTest, self).setUp()
         self.litp_utils = LitpUtils()
         self.cmd_utils = CMDUtils()
+        self.litp_password = self.litp_utils.get_litpadmin_password(self)
         self.litp_client = LitpClient(host=self.mws['ip'],
-            password=self.litp_utils.get_litpadmin_password(self))
+            password=self.litp_password)
         self.model = Model(self.litp_client)
         self.root_user = 'root'
         self.root_pass = self.mws['root_password']
@@ -32,11 +44,35 @@ class AddExpandTest(SanTest):
         self.node_pass = '12shroot'
         self.san_client = SanClient(self.san, navi_target=self.mws)
         self.postfix_lun = 'TORF92038'
+        # REST calls made to read the model while choosing new item ids
+        self.rest_calls = 0
+        self.child_ids = {}
         
     def tearDown(self):
         super(AddExpandTest, self).tearDown()
         self.litp_client.remove_plan()
 
+    def new_model_batch(self):
+        """
+        A ModelBatch whose workers each have their own LitpClient
+        """
+        return ModelBatch(lambda: LitpClient(host=self.mws['ip'],
+                                             password=self.litp_password))
+
+    def run_model_batch(self, batch):
+        """
+        Apply a ModelBatch, log its timings and fail on any failed change
+        """
+        report = batch.run()
+        for line in report.report():
+            if report:
+                self._logger.info(line)
+            else:
+                self._logger.error(line)
+        self.assertTrue(report, "%d model changes failed" %
+                        len(report.failed))
+        return report
+
     def prefix(self):
         """
         Creates a time stamp to add to the lun device name
@@ -97,12 +133,55 @@ class AddExpandTest(SanTest):
         return total_size
     
     def convert_to_gb(self, current_size):
+        """
+        Model size as an exact decimal number of GB
+        """
         size, type = self.split_size(current_size)
-        if type == "M":
-            size = size / 1024.0
-        elif type == "K":
-            size = size / 1048576.0
-        return size
+        return decimal.Decimal(size) / UNITS_PER_GB.get(type, 1)
+
+    def verify_lun_capacities(self, luns):
+        """
+        Verify the user capacity of each lun on the SAN matches its size
+        in the model, from one listing of the LUNs on the SAN.
+        Every mismatch is logged before the check fails.
+        """
+        san_luns = dict((san_lun['Name'], san_lun) for san_lun in
+                        self.san_client.navi_get_luns().values())
+        mismatches = []
+        for lun in luns:
+            model_lun_size = self.convert_to_gb(lun['size'])
+            san_lun = san_luns.get(lun['lun_name'])
+            if san_lun is None:
+                mismatches.append("LUN %s (%sGB) not found on the SAN" %
+                                  (lun['lun_name'], model_lun_size))
+                continue
+            check_lun_size = decimal.Decimal(san_lun['User Capacity (GBs)'])
+            # The SAN reports the capacity rounded, to 3 decimals, so the
+            # model size is rounded the same way before comparing
+            model_lun_size = model_lun_size.quantize(check_lun_size,
+                                                     decimal.ROUND_HALF_UP)
+            if check_lun_size != model_lun_size:
+                mismatches.append("LUN %s is %sGB on the SAN, %sGB in the "
+                                  "model" % (lun['lun_name'], check_lun_size,
+                                             model_lun_size))
+        self._logger.info("Checked the capacity of %d LUNs against %d on "
+                          "the SAN", len(luns), len(san_luns))
+        for mismatch in mismatches:
+            self._logger.error(mismatch)
+        self.assertFalse(mismatches)
+
+    def get_child_ids(self, path):
+        """
+        Ids of the children of a collection in the model, read with one
+        REST call per collection
+        """
+        if path not in self.child_ids:
+            self.rest_calls += 1
+            collection = self.litp_client.get(path)
+            self.child_ids[path] = set(child.id for child in
+                                       collection.children) \
+                if collection else set()
+        return self.child_ids[path]
 
     def get_luns_for_addition(self):
         """
@@ -112,21 +191,23 @@ class AddExpandTest(SanTest):
         luns = []
         prefix = self.prefix()
         base = self.postfix_lun
+        self.rest_calls = 0
+        self.child_ids = {}
         for node in self.model.nodes.values():
             for vg in node.vgs.values():
                 if vg.properties['volume_group_name'] != "vg_root":
                     for lunk in vg.luns:
                         lun = vg.luns[lunk]
                         basepath = lun.get_inherited_path(node) + '_'
+                        parent, lun_id = basepath.rsplit('/', 1)
+                        existing = self.get_child_ids(parent)
                         newpath = ''
                         vg_in = ''
                         for cnt in range(1, 51):
                             newpath = basepath + base + '_' + str(cnt)
                             vg_in = base + '_' + str(cnt)
-                            # Rest call to check model for newpath.
-                            # Break if it does not exist.
-                            check_path = self.litp_client.get(newpath)
-                            if not check_path:
+                            # Break at the first id not in the model
+                            if lun_id + vg_in not in existing:
                                 break
 
                         # Create the new LUN name using the last element of newpath
@@ -144,6 +225,8 @@ class AddExpandTest(SanTest):
                              vg_inherited=vg.inherited_path + '/physical_devices/'+ vg_in,
                              path=lun.get_path(node),
                              inherited_path=newpath))
+        self._logger.info("Chose ids for %d new LUNs with %d REST calls",
+                          len(luns), self.rest_calls)
         return luns
 
     def get_lun_properties(self):
@@ -161,18 +244,53 @@ class AddExpandTest(SanTest):
                                                "lun_uuid" : lun.properties['uuid'], "path": lun.path})
         return lun_properties
 
+    def get_scsi_devices(self, node_id):
+        """
+        The SCSI device listing of a node, in lower case, and the set of
+        device ids in it with and without their leading NAA digit.
+        Nodes are listed from several threads at once, so each listing
+        uses a CMDUtils of its own rather than the shared self.cmd_utils.
+        """
+        result = CMDUtils().run_ssh_command_via_proxy(SCSI_DEVICES_CMD,
+                                    self.mws['ip'], self.root_user,
+                                    self.root_pass, node_id,
+                                    self.node_user, self.node_pass)
+        listing = (result.stdout or '').lower()
+        ids = set()
+        for scsi_id in SCSI_ID_PATTERN.findall(listing):
+            ids.add(scsi_id)
+            ids.add(scsi_id[1:])
+        return listing, ids
+
     def verify_luns_on_host(self, luns):
         """
-        Verify that new luns can be seen on the host
+        Verify that new luns can be seen on the host.
+        Each node's devices are listed once, all nodes in parallel, and
+        every LUN expected on the node is looked up in that listing.
         """
+        uuids = {}
         for lun in luns:
-            node_path = "/".join(lun["path"].split("/")[0:7])
-            node = self.litp_client.get(node_path)
-            cmd = "ls -l /dev/disk/*/* | grep -i " + lun['lun_uuid'] + " | grep scsi"
-            result = self.cmd_utils.run_ssh_command_via_proxy(cmd, self.mws['ip'],
-                                    self.root_user, self.root_pass, node.id, 
-                                    self.node_user, self.node_pass)
-            self.assertTrue(result.stdout)
+            node_id = lun["path"].split("/")[6]
+            uuids.setdefault(node_id, []).append(lun['lun_uuid'].lower())
+
+        results = run_parallel(sorted(uuids), self.get_scsi_devices,
+                               DEFAULT_WORKERS)
+        missing = []
+        for result in results:
+            node_id = result.item
+            if not result.ok:
+                self._logger.error("Listing devices on %s failed: %s",
+                                   node_id, result.error)
+                missing.extend((uuid, node_id) for uuid in uuids[node_id])
+                continue
+            listing, ids = result.value
+            missing.extend((uuid, node_id) for uuid in uuids[node_id]
+                           if uuid not in ids and uuid not in listing)
+        self._logger.info("Checked %d LUNs on %d nodes", len(luns),
+                          len(uuids))
+        for uuid, node_id in missing:
+            self._logger.error("LUN %s not seen on %s", uuid, node_id)
+        self.assertFalse(missing)
 
 class Obj(object):
     def __init__(self, **kwargs):
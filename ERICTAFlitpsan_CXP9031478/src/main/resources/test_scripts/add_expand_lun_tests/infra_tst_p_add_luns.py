@@ -11,7 +11,6 @@ TORF-97834
 from add_expand_luns_test import AddExpandTest
 from ptaf.utils.litp_utils.api_client import LitpException
 from infra_utils.utils.enm_helpers import Model
-import decimal
 
 class TestCase(AddExpandTest):
 
@@ -39,6 +38,7 @@ class TestCase(AddExpandTest):
         # find a list of LUNs
         luns = self.get_luns_for_addition()
         created_devices = set([])
+        batch = self.new_model_batch()
         for lun in luns:
             lun_attributes = {"lun_name": lun.lunk,
                              "name": lun.name,
@@ -50,14 +50,16 @@ class TestCase(AddExpandTest):
                              "external_snap": lun.external_snap}
             phys_attributes = {"device_name": lun.name}
 
-            # make the LITP create_item call to create new LUNs
-            item = self.litp_client.create_item(lun.inherited_path, 'lun-disk', **lun_attributes)
+            # queue the LITP create_item call to create new LUNs
+            batch.create_item(lun.inherited_path, 'lun-disk', **lun_attributes)
             self._logger.info("Creating " + lun.lunk)
   
             # 2: Add each new LUN to a storage profile
             if lun.vg_inherited not in created_devices:
-                item = self.litp_client.create_item(lun.vg_inherited, 'physical-device', **phys_attributes)
+                batch.create_item(lun.vg_inherited, 'physical-device', **phys_attributes)
                 created_devices.add(lun.vg_inherited)
+
+        self.run_model_batch(batch)
   
         # 3: Run LITP create_plan
         self._logger.info("Creating Plan")
@@ -67,7 +69,7 @@ class TestCase(AddExpandTest):
         self._logger.info("Running Plan")
         run_result = self.litp_client.run_plan()
   
-        self.litp_client.wait_plan_completion()
+        self.wait_plan_completion()
 
         # 5: Use Navisec CLI to verify LUNs have been added
         #create new model instance here
@@ -80,12 +82,7 @@ class TestCase(AddExpandTest):
         self.verify_luns_on_host(lun_properties)
 
         self._logger.info("Verifying LUN sizes")
-
-        for lun in lun_properties:
-            check_lun = self.san_client.navi_get_lun(lun['lun_name'])
-            check_lun_size = decimal.Decimal(check_lun['User Capacity (GBs)'])
-            model_lun_size = decimal.Decimal(self.convert_to_gb(lun['size']))
-            self.assertEquals(check_lun_size, model_lun_size)
+        self.verify_lun_capacities(lun_properties)
 
 if __name__ == '__main__':
     TestCase().run_test()
@@ -11,7 +11,6 @@ TORF-80399
 from add_expand_luns_test import AddExpandTest
 from ptaf.utils.litp_utils.api_client import LitpException
 from infra_utils.utils.enm_helpers import Model
-import decimal
 
 class TestCase(AddExpandTest):
 
@@ -37,8 +36,9 @@ class TestCase(AddExpandTest):
         pre_expansion_luns = self.get_luns_for_expansion()
 
         # 2: update each LUN by 1G using litp_client.update_item
-        #make litp_client.update_item call
+        #queue litp_client.update_item calls
         expand_size = 0
+        batch = self.new_model_batch()
         self._logger.info('\nExpanding LUNs')
         for lun in pre_expansion_luns:
             current_size = str(lun.size)
@@ -46,8 +46,8 @@ class TestCase(AddExpandTest):
             total_size = str(self.get_new_lun_size(current_size))
             self._logger.info("New Size of " + lun.lunk + ": "+ total_size)
             lun_attributes = {"size": total_size}
-            self.litp_client.update_item(lun.inherited_path, \
-                                                **lun_attributes)
+            batch.update_item(lun.inherited_path, **lun_attributes)
+        self.run_model_batch(batch)
 
         # 3: Run LITP create_plan
         self._logger.info("Creating Plan")
@@ -57,20 +57,14 @@ class TestCase(AddExpandTest):
         self._logger.info("Running Plan")
         self.litp_client.run_plan()
 
-        self.litp_client.wait_plan_completion()
+        self.wait_plan_completion()
 
         # 5: Use Navisec CLI to verify LUNs have been expanded
         #new model instance here
         self.model = Model(self.litp_client)
         #get lun name and sizes here
         lun_properties = self.get_lun_properties()
-
-        for lun in lun_properties:
-            check_lun = self.san_client.navi_get_lun(lun['lun_name'])
-            check_lun_size = check_lun['User Capacity (GBs)']
-            model_lun_size = self.convert_to_gb(lun['size'])
-            check_lun_size, model_lun_size = decimal.Decimal(check_lun_size), decimal.Decimal(model_lun_size)
-            self.assertEquals(check_lun_size, model_lun_size)
+        self.verify_lun_capacities(lun_properties)
 
 if __name__ == '__main__':
     TestCase().run_test()
@@ -0,0 +1 @@
+../common/model_batch.py
\ No newline at end of file
@@ -0,0 +1 @@
+../common/plan_utils.py
\ No newline at end of file
@@ -0,0 +1 @@
+../common/run_in_worker.py
\ No newline at end of file
@@ -0,0 +1,129 @@
+"""
+DESCRIPTION:
+Cached VCS service group state for the restore test cases.
+
+RestoreTest checks a service is online with one hastatus command per
+service and file system, so the same state is queried many times for each
+node. HaStatusMixin instead runs 'hastatus -sum' once per node and answers
+every run_hastatus_online_command for that node from its output, until the
+cache is invalidated. Invalidate it after anything which changes the state
+of the services, such as a restore or a node reboot.
+"""
+
+import threading
+
+from ssh_pool import CmdResult
+
+HASTATUS_CMD = '/opt/VRTSvcs/bin/hastatus -sum'
+
+
+class HaStatusCache(object):
+
+    """
+    Service group states from 'hastatus -sum', keyed by (node, service)
+    """
+
+    def __init__(self, context):
+        """
+        context is the running test case, used to run hastatus on the nodes
+        """
+        self.context = context
+        self._groups = {}
+        self._node_locks = {}
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.hits = 0
+
+    def get_group_lines(self, node, context=None):
+        """
+        Returns the group state lines of 'hastatus -sum' on the node,
+        running it only if there are none cached for the node. context is
+        the test case to run it through, if not the one the cache is for.
+        """
+        with self._lock:
+            node_lock = self._node_locks.setdefault(node.id, threading.Lock())
+
+        with node_lock:
+            if node.id in self._groups:
+                with self._lock:
+                    self.hits += 1
+                return self._groups[node.id]
+
+            res = (context or self.context).run_node_command(HASTATUS_CMD,
+                                                             node)
+            with self._lock:
+                self.queries += 1
+            # Group lines are 'B  <group>  <system>  <probed>
+            # <autodisabled>  <state>'
+            lines = [line.strip() for line in res.stdout.splitlines()
+                     if line.startswith('B ')]
+            self._groups[node.id] = lines
+            return lines
+
+    def get_service_status(self, service_id, node, context=None):
+        """
+        Returns the state lines of the service group on the node, as the
+        result of the hastatus command it replaces
+        """
+        hostname = node.properties['hostname']
+        lines = [line for line in self.get_group_lines(node, context)
+                 if service_id in line.split()[1]
+                 and line.split()[2] == hostname]
+        return CmdResult('\n'.join(lines), '', 0 if lines else 1)
+
+    def invalidate(self, node=None):
+        """
+        Discard the cached state of the node, or of every node
+        """
+        with self._lock:
+            if node is None:
+                self._groups.clear()
+            else:
+                self._groups.pop(node.id, None)
+
+    def summary(self):
+        """
+        Cache use counters as a line for the test log
+        """
+        return "hastatus queries: %d, answered from cache: %d" % (
+                self.queries, self.hits)
+
+
+class HaStatusMixin(object):
+
+    """
+    Answers run_hastatus_online_command of RestoreTest from a per node
+    HaStatusCache. Mix in before RestoreTest.
+    """
+
+    # Users for running commands on the peer nodes as root
+    node_user = 'litp-admin'
+    node_root = '12shroot'
+
+    def setUp(self):
+        super(HaStatusMixin, self).setUp()
+        self.ha_status = HaStatusCache(self)
+
+    def run_node_command(self, command, node):
+        """
+        Run a command as root on a peer node, through the MS
+        """
+        node_pass = self.get_node_password(node, self.node_user)
+        return self.cmd_utils.run_ssh_command_as_root_via_proxy(command,
+                self.mws['ip'], 'root', self.mws['root_password'],
+                node.ip, self.node_user, node_pass, self.node_root)
+
+    def run_hastatus_online_command(self, service_id, node):
+        """
+        State of the service on the node, from the cached hastatus output.
+        The cache is shared by the copies of the test case in node threads,
+        hastatus runs over the SSH connections of the copy asking.
+        """
+        return self.ha_status.get_service_status(service_id, node, self)
+
+    def invalidate_ha_status(self, node=None):
+        """
+        Call after a restore, a reboot or anything else which changes the
+        state of the services on the node, or on every node
+        """
+        self.ha_status.invalidate(node)
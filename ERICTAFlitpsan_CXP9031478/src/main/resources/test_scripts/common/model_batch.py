@@ -0,0 +1,139 @@
+"""
+DESCRIPTION:
+Batched changes to the LITP model.
+
+Creating or updating the items for every LUN of a large deployment one
+REST call at a time takes minutes before create_plan can even be run.
+ModelBatch collects independent create_item and update_item calls and
+sends them a few at a time. Each worker thread keeps its own LitpClient
+for the whole batch, so its connection is reused from one call to the
+next rather than calls being queued behind one shared client.
+
+Every operation is timed. A failed operation does not stop the others;
+all the failures are reported together once the batch has run.
+"""
+
+import os
+import threading
+import time
+
+from parallel import run_parallel
+
+# Model changes in flight at once
+LITP_MAX_PARALLEL = int(os.environ.get('LITPSAN_LITP_MAX_PARALLEL', 8))
+
+
+class ModelOperation(object):
+
+    """
+    One create_item or update_item call
+    """
+
+    def __init__(self, action, path, item_type=None, properties=None):
+        self.action = action
+        self.path = path
+        self.item_type = item_type
+        self.properties = properties or {}
+
+    def apply(self, client):
+        if self.action == 'create':
+            return client.create_item(self.path, self.item_type,
+                                      **self.properties)
+        return client.update_item(self.path, **self.properties)
+
+    def __str__(self):
+        if self.action == 'create':
+            return "create %s %s" % (self.item_type, self.path)
+        return "update %s" % self.path
+
+    def __repr__(self):
+        return self.__str__()
+
+
+class BatchReport(object):
+
+    """
+    Outcome of a ModelBatch run. True when every operation succeeded.
+
+    latencies  (operation, seconds) for every operation, in batch order
+    failed     (operation, error) for every operation that failed
+    """
+
+    def __init__(self):
+        self.latencies = []
+        self.failed = []
+        self.duration = 0.0
+
+    def __nonzero__(self):
+        return not self.failed
+
+    def slowest(self, count=5):
+        return sorted(self.latencies, key=lambda latency: latency[1],
+                      reverse=True)[:count]
+
+    def report(self):
+        """
+        Lines describing the batch, for the test log
+        """
+        lines = ["%d model changes in %.1fs, %d failed" % (
+                 len(self.latencies), self.duration, len(self.failed))]
+        lines.extend("  %.2fs %s" % (seconds, operation)
+                     for operation, seconds in self.slowest())
+        lines.extend("Failed to %s: %s" % (operation, error)
+                     for operation, error in self.failed)
+        return lines
+
+    def __str__(self):
+        return '\n'.join(self.report())
+
+    def __repr__(self):
+        return self.__str__()
+
+
+class ModelBatch(object):
+
+    """
+    Independent model changes, sent with bounded concurrency.
+    client_factory returns a new LitpClient; one is made per worker.
+    """
+
+    def __init__(self, client_factory, max_workers=LITP_MAX_PARALLEL):
+        self.client_factory = client_factory
+        self.max_workers = max_workers
+        self.operations = []
+        self.local = threading.local()
+
+    def create_item(self, path, item_type, **properties):
+        self.operations.append(ModelOperation('create', path, item_type,
+                                              properties))
+
+    def update_item(self, path, **properties):
+        self.operations.append(ModelOperation('update', path,
+                                              properties=properties))
+
+    def __len__(self):
+        return len(self.operations)
+
+    def get_client(self):
+        client = getattr(self.local, 'client', None)
+        if client is None:
+            client = self.local.client = self.client_factory()
+        return client
+
+    def run(self):
+        """
+        Apply every operation and return a BatchReport
+        """
+        report = BatchReport()
+        start = time.time()
+        results = run_parallel(self.operations,
+                               lambda operation: operation.apply(
+                                   self.get_client()),
+                               self.max_workers)
+        for result in results:
+            report.latencies.append((result.item, result.duration))
+            if not result.ok:
+                report.failed.append((result.item, result.error))
+        report.duration = time.time() - start
+        self.operations = []
+        return report
@@ -0,0 +1,111 @@
+"""
+DESCRIPTION:
+Bounded fan-out of independent work, such as per node commands, over a
+pool of threads.
+
+Results come back in the order the items were given, whatever order the
+work finished in. Anything a task prints can be captured per task, so the
+caller can print it grouped by item rather than interleaved.
+"""
+
+import os
+import sys
+import threading
+import time
+import traceback
+import Queue
+
+DEFAULT_WORKERS = int(os.environ.get('LITPSAN_MAX_WORKERS', 8))
+
+
+class TaskResult(object):
+
+    """
+    Outcome of running the task for one item
+    """
+
+    def __init__(self, item):
+        self.item = item
+        self.value = None
+        self.error = None
+        self.traceback = None
+        self.output = ''
+        self.duration = 0.0
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+class _ThreadOutput(object):
+
+    """
+    Stands in for sys.stdout while tasks run, sending what each worker
+    thread prints to that thread's buffer
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+
+    def write(self, data):
+        buf = getattr(self.local, 'buffer', None)
+        if buf is None:
+            self.stream.write(data)
+        else:
+            buf.append(data)
+
+    def flush(self):
+        self.stream.flush()
+
+
+def run_parallel(items, task, max_workers=DEFAULT_WORKERS,
+                 capture_output=False):
+    """
+    Runs task(item) for every item with at most max_workers running at
+    once and returns a TaskResult per item, in the order of items.
+    Exceptions raised by a task are kept on its result, not raised.
+    With capture_output, what each task prints is kept on its result.
+    """
+    items = list(items)
+    results = [TaskResult(item) for item in items]
+    pending = Queue.Queue()
+    for result in results:
+        pending.put(result)
+
+    output = None
+    if capture_output:
+        output = _ThreadOutput(sys.stdout)
+        sys.stdout = output
+
+    def worker():
+        while True:
+            try:
+                result = pending.get_nowait()
+            except Queue.Empty:
+                return
+            if output is not None:
+                output.local.buffer = []
+            start = time.time()
+            try:
+                result.value = task(result.item)
+            except Exception as error:
+                result.error = error
+                result.traceback = traceback.format_exc()
+            result.duration = time.time() - start
+            if output is not None:
+                result.output = ''.join(output.local.buffer)
+                output.local.buffer = None
+
+    threads = [threading.Thread(target=worker)
+               for _ in range(max(1, min(max_workers, len(items))))]
+    try:
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        if output is not None:
+            sys.stdout = output.stream
+    return results
@@ -0,0 +1,179 @@
+"""
+DESCRIPTION:
+History of plan task timelines, for spotting slow SAN plugin tasks.
+
+Each plan waited on by PlanWaiterMixin is stored as a run in a local SQLite
+database, keyed by the deployment (the MS it ran against) and the version
+of the SAN plugin installed on it. The duration of every SAN plugin task
+in a new run is compared with the durations of the same task in earlier
+runs on the same deployment, and flagged as a regression if it is above
+the configured percentile of those.
+
+LITP does not give the times of task state changes, so the durations are
+measured by PlanWaiter polling and are only as fine as its poll interval,
+which grows to a minute on a long plan. Each duration is stored with its
+resolution, and a task is only flagged if it overran by more than that.
+"""
+
+import os
+import re
+import sqlite3
+import time
+
+HISTORY_FILE = os.environ.get('LITPSAN_PLAN_HISTORY',
+        os.path.expanduser('~/.litpsan_plan_history.db'))
+
+# Percentile of the earlier durations a task has to exceed to be flagged
+REGRESSION_PERCENTILE = float(os.environ.get(
+        'LITPSAN_PLAN_REGRESSION_PERCENTILE', 95))
+
+# Earlier runs of a task needed before it can be flagged
+REGRESSION_MIN_RUNS = int(os.environ.get('LITPSAN_PLAN_REGRESSION_MIN_RUNS',
+                                         5))
+
+# Tasks whose description matches are treated as SAN plugin tasks
+SAN_TASK_PATTERN = re.compile(os.environ.get('LITPSAN_PLAN_SAN_TASKS',
+        r'(?i)\bLUN\b|snapshot|storage pool|pool snapshot reserve'))
+
+SAN_PLUGIN_RPM = 'ERIClitpsan_'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    deployment TEXT NOT NULL,
+    plugin_version TEXT NOT NULL,
+    label TEXT,
+    state TEXT,
+    started REAL,
+    ended REAL
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    phase TEXT,
+    description TEXT NOT NULL,
+    state TEXT,
+    started REAL,
+    ended REAL,
+    duration REAL,
+    resolution REAL
+);
+CREATE INDEX IF NOT EXISTS tasks_description ON tasks (description);
+CREATE INDEX IF NOT EXISTS runs_deployment ON runs (deployment);
+"""
+
+
+class Regression(object):
+
+    """
+    A SAN plugin task which took longer than usual
+    """
+
+    def __init__(self, description, duration, threshold, runs,
+                 resolution=0.0):
+        self.description = description
+        self.duration = duration
+        self.threshold = threshold
+        self.runs = runs
+        self.resolution = resolution
+
+    def __str__(self):
+        return ("%s took %.1fs (+/- %.1fs), the %gth percentile of %d "
+                "earlier runs is %.1fs" % (self.description, self.duration,
+                self.resolution, REGRESSION_PERCENTILE, self.runs,
+                self.threshold))
+
+    def __repr__(self):
+        return self.__str__()
+
+
+class PlanHistory(object):
+
+    """
+    SQLite store of plan task timelines
+    """
+
+    def __init__(self, path=HISTORY_FILE):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+        # Histories written before durations had a resolution
+        columns = [row[1] for row in
+                   self.db.execute("PRAGMA table_info(tasks)")]
+        if 'resolution' not in columns:
+            with self.db:
+                self.db.execute("ALTER TABLE tasks ADD COLUMN resolution "
+                                "REAL")
+
+    def close(self):
+        self.db.close()
+
+    def record(self, deployment, plugin_version, waiter, plan_state,
+               label=None):
+        """
+        Store the timeline of a PlanWaiter, returns the id of the run
+        """
+        with self.db:
+            cursor = self.db.execute(
+                "INSERT INTO runs (deployment, plugin_version, label, state, "
+                "started, ended) VALUES (?, ?, ?, ?, ?, ?)",
+                (deployment, plugin_version, label, plan_state,
+                 waiter.start, waiter.end or time.time()))
+            run_id = cursor.lastrowid
+            self.db.executemany(
+                "INSERT INTO tasks (run_id, phase, description, state, "
+                "started, ended, duration, resolution) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(run_id, timing.phase, timing.description, timing.state,
+                  timing.start, timing.end, timing.duration,
+                  timing.resolution) for timing in waiter.timeline])
+        return run_id
+
+    def get_durations(self, deployment, description, before_run):
+        """
+        Durations of the successful runs of a task on the deployment,
+        from the runs before before_run
+        """
+        rows = self.db.execute(
+            "SELECT tasks.duration FROM tasks JOIN runs "
+            "ON tasks.run_id = runs.id "
+            "WHERE runs.deployment = ? AND tasks.description = ? "
+            "AND tasks.state = 'Success' AND tasks.duration IS NOT NULL "
+            "AND runs.id < ?", (deployment, description, before_run))
+        return [row[0] for row in rows]
+
+    def find_regressions(self, deployment, run_id,
+                         percentile=REGRESSION_PERCENTILE,
+                         min_runs=REGRESSION_MIN_RUNS):
+        """
+        SAN plugin tasks of the run which took longer than the percentile
+        of their earlier durations on the deployment, by more than the
+        resolution of the measured duration
+        """
+        rows = self.db.execute(
+            "SELECT description, duration, resolution FROM tasks "
+            "WHERE run_id = ? AND state = 'Success' "
+            "AND duration IS NOT NULL", (run_id,))
+        regressions = []
+        for description, duration, resolution in rows.fetchall():
+            if not SAN_TASK_PATTERN.search(description):
+                continue
+            history = self.get_durations(deployment, description, run_id)
+            if len(history) < min_runs:
+                continue
+            threshold = get_percentile(history, percentile)
+            if duration - threshold > (resolution or 0.0):
+                regressions.append(Regression(description, duration,
+                                              threshold, len(history),
+                                              resolution or 0.0))
+        return regressions
+
+
+def get_percentile(values, percentile):
+    """
+    The percentile of values, interpolating between the closest ranks
+    """
+    values = sorted(values)
+    rank = (len(values) - 1) * percentile / 100.0
+    lower = int(rank)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (rank - lower)
@@ -0,0 +1,381 @@
+"""
+DESCRIPTION:
+Waiting on LITP plans with per task timing.
+
+LitpClient.wait_plan_completion polls the plan at a fixed interval and only
+returns the final plan. PlanWaiter polls the tasks of the phase the plan is
+working on instead, prints every task state change as it sees it and
+returns a timing record for every task, so the slow tasks of a
+create_snapshot or restore_snapshot plan can be picked out.
+
+The poll interval starts short, grows while nothing changes and drops back
+as soon as a task changes state. It is kept short while the plan is down
+to its last few tasks, so the end of the plan is noticed quickly.
+
+TaskIndex answers task state lookups by description, by exact description
+or by prefix, from one read of the plan, so a test case can check many
+tasks without fetching the plan again for each one.
+"""
+
+import bisect
+import os
+import sys
+import time
+
+from ptaf.utils.cmd_utils import CMDUtils
+
+from plan_history import PlanHistory, SAN_PLUGIN_RPM
+
+PLAN_PATH = '/plans/plan'
+
+# Plan states in which the plan will not change any further
+PLAN_DONE_STATES = ('successful', 'failed', 'stopped', 'invalid')
+
+# Task states in which the task will not change any further
+TASK_DONE_STATES = ('Success', 'Failed', 'Stopped')
+
+POLL_MIN = float(os.environ.get('LITPSAN_PLAN_POLL_MIN', 2))
+POLL_MAX = float(os.environ.get('LITPSAN_PLAN_POLL_MAX', 60))
+PLAN_TIMEOUT = int(os.environ.get('LITPSAN_PLAN_TIMEOUT', 3 * 60 * 60))
+
+# How much the poll interval grows by for each poll without a change
+POLL_BACKOFF = 1.5
+
+# Remaining task count at which the plan is polled at the minimum interval
+FINAL_TASKS = 2
+
+
+class PlanWaitTimeout(Exception):
+    pass
+
+
+class TaskTiming(object):
+
+    """
+    Timing of one plan task. LITP does not give the times of task state
+    changes, so the times are those of the poll which saw the change and
+    each may be late by up to the time since the poll before it.
+    """
+
+    def __init__(self, phase, task_id, description, state):
+        self.phase = phase
+        self.task_id = task_id
+        self.description = description
+        self.state = state
+        self.start = None
+        self.end = None
+        self.start_error = 0.0
+        self.end_error = 0.0
+
+    @property
+    def duration(self):
+        if self.start is None or self.end is None:
+            return None
+        return self.end - self.start
+
+    @property
+    def resolution(self):
+        """
+        How far the duration may be from the real one, in seconds
+        """
+        if self.duration is None:
+            return None
+        return max(self.start_error, self.end_error)
+
+    def __str__(self):
+        duration = self.duration
+        return "phase %s %-10s %8s  %s" % (self.phase, self.state,
+                '-' if duration is None else '%.1fs' % duration,
+                self.description)
+
+    def __repr__(self):
+        return self.__str__()
+
+
+class PlanWaiter(object):
+
+    """
+    Waits on the current LITP plan, recording when each task started and
+    finished
+    """
+
+    def __init__(self, client, logger=None, poll_min=POLL_MIN,
+                 poll_max=POLL_MAX, timeout=PLAN_TIMEOUT):
+        self.client = client
+        self.logger = logger
+        self.poll_min = poll_min
+        self.poll_max = poll_max
+        self.timeout = timeout
+        self.phases = []
+        self.tasks = {}
+        self.polls = 0
+        self.start = None
+        self.end = None
+        self.last_task_poll = None
+
+    def wait(self):
+        """
+        Polls the plan until it reaches a final state and returns the plan.
+        The task timings are kept in timeline.
+        """
+        self.start = time.time()
+        self.load_tasks()
+        self.last_task_poll = time.time()
+        interval = self.poll_min
+        while True:
+            plan = self.client.get(PLAN_PATH)
+            self.polls += 1
+            if plan is None or plan.properties['state'] in PLAN_DONE_STATES:
+                # Pick up the tasks which finished since the last poll
+                self.poll_tasks()
+                self.end = time.time()
+                self.log("Plan %s after %.1fs, %d polls",
+                         plan.properties['state'] if plan else 'removed',
+                         self.end - self.start, self.polls)
+                return plan
+
+            if time.time() - self.start > self.timeout:
+                raise PlanWaitTimeout("Plan still %s after %ds" % (
+                        plan.properties['state'], self.timeout))
+
+            if self.poll_tasks():
+                interval = self.poll_min
+            else:
+                interval = min(interval * POLL_BACKOFF, self.poll_max)
+            if self.remaining() <= FINAL_TASKS:
+                interval = self.poll_min
+            time.sleep(interval)
+
+    def load_tasks(self):
+        """
+        Reads the phases and tasks of the plan once, so later polls only
+        need to read the tasks of the active phase
+        """
+        self.phases = []
+        self.tasks = {}
+        phases = self.client.get(PLAN_PATH + '/phases')
+        if phases is None:
+            return
+        for phase in sorted(phases.children, key=lambda p: int(p.id)):
+            self.phases.append(phase.id)
+            for task in self.get_phase_tasks(phase.id):
+                timing = TaskTiming(phase.id, task.id,
+                                    task.properties['description'],
+                                    task.properties['state'])
+                self.tasks[(phase.id, task.id)] = timing
+
+    def get_phase_tasks(self, phase_id):
+        tasks = self.client.get('%s/phases/%s/tasks' % (PLAN_PATH, phase_id))
+        return tasks.children if tasks is not None else []
+
+    def active_phases(self):
+        """
+        Phases with tasks still to finish, in plan order
+        """
+        return [phase for phase in self.phases if self.phase_remaining(phase)]
+
+    def phase_remaining(self, phase):
+        return len([timing for (task_phase, _), timing in self.tasks.items()
+                    if task_phase == phase
+                    and timing.state not in TASK_DONE_STATES])
+
+    def poll_tasks(self):
+        """
+        Reads the tasks of the first unfinished phase, moving on to the
+        next phase only if that one has now finished, and records each
+        task state change. Returns whether any task changed state.
+        """
+        changed = False
+        for phase in self.active_phases():
+            now = time.time()
+            # A change seen now happened at most this long ago
+            error = now - (self.last_task_poll or now)
+            for task in self.get_phase_tasks(phase):
+                timing = self.tasks.get((phase, task.id))
+                state = task.properties['state']
+                if timing is None or timing.state == state:
+                    continue
+                self.record(timing, state, now, error)
+                changed = True
+            self.last_task_poll = now
+            # LITP runs the phases in order, so a later phase
+            # cannot have started while this one is unfinished
+            if self.phase_remaining(phase):
+                break
+        return changed
+
+    def record(self, timing, state, now, error=0.0):
+        if timing.start is None and state != 'Initial':
+            timing.start = now
+            timing.start_error = error
+        if state in TASK_DONE_STATES:
+            timing.end = now
+            timing.end_error = error
+        timing.state = state
+        self.log("Task %s: %s", state, timing.description)
+
+    def remaining(self):
+        return len([timing for timing in self.tasks.values()
+                    if timing.state not in TASK_DONE_STATES])
+
+    @property
+    def timeline(self):
+        """
+        Timing records for every task of the plan, in plan order
+        """
+        return [self.tasks[key] for key in sorted(self.tasks,
+                key=lambda k: (int(k[0]), k[1]))]
+
+    def slowest(self, count=5):
+        """
+        The tasks which took longest
+        """
+        timed = [timing for timing in self.tasks.values()
+                 if timing.duration is not None]
+        return sorted(timed, key=lambda t: t.duration, reverse=True)[:count]
+
+    def log(self, fmt, *args):
+        if self.logger is not None:
+            self.logger.info(fmt, *args)
+        else:
+            print fmt % args
+
+
+class TaskIndex(object):
+
+    """
+    Plan tasks indexed by description
+    """
+
+    def __init__(self, timings):
+        self.by_description = {}
+        for timing in timings:
+            self.by_description.setdefault(timing.description,
+                                           []).append(timing)
+        self.descriptions = sorted(self.by_description)
+
+    @classmethod
+    def load(cls, client):
+        """
+        Index of the tasks of the current plan, read with one call for
+        the phases and one for the tasks of each phase
+        """
+        waiter = PlanWaiter(client)
+        waiter.load_tasks()
+        return cls(waiter.timeline)
+
+    def get(self, description):
+        """
+        Tasks with exactly this description
+        """
+        return self.by_description.get(description, [])
+
+    def find(self, prefix):
+        """
+        Tasks whose description starts with prefix, in description order
+        """
+        start = bisect.bisect_left(self.descriptions, prefix)
+        tasks = []
+        for description in self.descriptions[start:]:
+            if not description.startswith(prefix):
+                break
+            tasks.extend(self.by_description[description])
+        return tasks
+
+    def search(self, text):
+        """
+        Tasks whose description contains text, in description order
+        """
+        tasks = []
+        for description in self.descriptions:
+            if text in description:
+                tasks.extend(self.by_description[description])
+        return tasks
+
+    def get_status(self, name):
+        """
+        State of the task named by its description or part of it, like
+        LitpUtils.get_litp_task_status. An exact match wins over a prefix
+        match, which wins over a match anywhere in the description. Of
+        several tasks with exactly the description, a failed one is
+        reported. A prefix or partial match must name one description:
+        'lun1' matching the tasks for both 'lun1' and 'lun10' raises
+        ValueError rather than report the state of either. Returns None
+        if no task matches.
+        """
+        tasks = self.get(name)
+        if not tasks:
+            tasks = self.find(name) or self.search(name)
+            descriptions = sorted(set(task.description for task in tasks))
+            if len(descriptions) > 1:
+                raise ValueError('"%s" matches %d plan tasks: %s' % (
+                    name, len(descriptions), '; '.join(descriptions)))
+        if not tasks:
+            return None
+        for task in tasks:
+            if task.state == 'Failed':
+                return task.state
+        return tasks[0].state
+
+
+class PlanWaiterMixin(object):
+
+    """
+    Gives a test case a wait_plan_completion which records the task
+    timings of each plan it waits on in plan_timelines and in the plan
+    history, and flags the SAN plugin tasks which regressed. The tasks of
+    the last plan waited on are indexed in plan_tasks.
+    """
+
+    def wait_plan_completion(self, timeout=PLAN_TIMEOUT):
+        """
+        Waits on the current plan, logging the slowest tasks when it ends,
+        and returns the plan like LitpClient.wait_plan_completion
+        """
+        waiter = PlanWaiter(self.litp_client, self._logger, timeout=timeout)
+        plan = waiter.wait()
+        if not hasattr(self, 'plan_timelines'):
+            self.plan_timelines = []
+            self.plan_regressions = []
+        self.plan_timelines.append(waiter.timeline)
+        self.plan_tasks = TaskIndex(waiter.timeline)
+        for timing in waiter.slowest():
+            self._logger.info("Slow task: %s", timing)
+        if waiter.timeline:
+            self.record_plan_history(waiter,
+                    plan.properties['state'] if plan else 'removed')
+        return plan
+
+    def record_plan_history(self, waiter, plan_state):
+        """
+        Store the timeline in the plan history and log the SAN plugin
+        tasks which took longer than usual. The history is only for
+        reporting, so a problem with it never fails the test case.
+        """
+        deployment = self.mws['ip']
+        try:
+            history = PlanHistory()
+            try:
+                run_id = history.record(deployment, self.get_plugin_version(),
+                        waiter, plan_state,
+                        label=os.path.basename(sys.argv[0]))
+                regressions = history.find_regressions(deployment, run_id)
+            finally:
+                history.close()
+        except Exception as error:
+            self._logger.warning("Plan history not updated: %s", error)
+            return
+        for regression in regressions:
+            self._logger.warning("Task regression: %s", regression)
+        self.plan_regressions.extend(regressions)
+
+    def get_plugin_version(self):
+        """
+        Version of the SAN plugin installed on the MS
+        """
+        if getattr(self, 'plugin_version', None) is None:
+            res = CMDUtils().run_ssh_command(
+                "rpm -qa --qf '%%{VERSION}\\n' '%s*'" % SAN_PLUGIN_RPM,
+                self.mws['ip'], 'root', self.mws['root_password'])
+            self.plugin_version = res.stdout.strip() or 'unknown'
+        return self.plugin_version
@@ -0,0 +1,201 @@
+"""
+DESCRIPTION:
+Snapshot space needed by the snappable LUNs, per storage pool.
+
+The SAN plugin checks before it snaps the LUNs that each storage pool can
+hold their snapshots. A LUN with external_snap false and a snap_size above
+0 needs snap_size percent of its size in its pool: of its consumed capacity
+for a thin LUN, and of its user capacity for a thick one.
+
+The capacities of every LUN come from one LUN listing, either live through
+navi_get_luns or parsed from the saved output of 'naviseccli lun -list',
+instead of one query per LUN.
+"""
+
+import re
+
+
+def is_snappable(model_lun):
+    """
+    Whether the SAN plugin snaps a lun-disk item from the model
+    """
+    return (model_lun.properties['external_snap'] == 'false' and
+            model_lun.properties['snap_size'] != '0')
+
+
+class LunCapacity(object):
+
+    """
+    Capacity of one LUN on the SAN, in GB
+    """
+
+    def __init__(self, name, pool, thin, user_gb, consumed_gb):
+        self.name = name
+        self.pool = pool
+        self.thin = thin
+        self.user_gb = user_gb
+        self.consumed_gb = consumed_gb
+
+    @classmethod
+    def from_navi(cls, lun):
+        """
+        From a LUN as listed by navi_get_luns or navi_get_lun
+        """
+        return cls(lun['Name'], lun.get('Pool Name'),
+                   lun.get('Is Thin LUN') == 'Yes',
+                   float(lun.get('User Capacity (GBs)') or 0),
+                   float(lun.get('Consumed Capacity (GBs)') or 0))
+
+    @property
+    def snap_base_gb(self):
+        """
+        The capacity the snapshot reserve of the LUN is a percentage of
+        """
+        return self.consumed_gb if self.thin else self.user_gb
+
+    def __str__(self):
+        return "%s (pool %s, %s, user %.2fGB, consumed %.2fGB)" % (
+                self.name, self.pool, 'thin' if self.thin else 'thick',
+                self.user_gb, self.consumed_gb)
+
+    def __repr__(self):
+        return self.__str__()
+
+
+def parse_lun_list(output):
+    """
+    Parse the output of 'naviseccli lun -list' into a list of dicts with
+    the same keys as the LUNs returned by navi_get_luns
+    """
+    luns = []
+    lun = None
+    for line in output.splitlines():
+        if line.startswith('LOGICAL UNIT NUMBER'):
+            lun = {'LOGICAL UNIT NUMBER': line.split()[-1]}
+            luns.append(lun)
+            continue
+        match = re.match(r'^([^:]+):\s*(.*)$', line)
+        if lun is not None and match:
+            lun[match.group(1).strip()] = match.group(2).strip()
+    return luns
+
+
+def parse_pool_list(output):
+    """
+    Parse the output of 'naviseccli storagepool -list' into a dict of pool
+    name to its available capacity in GB
+    """
+    pools = {}
+    name = None
+    for line in output.splitlines():
+        match = re.match(r'^([^:]+):\s*(.*)$', line)
+        if not match:
+            continue
+        key, value = match.group(1).strip(), match.group(2).strip()
+        if key == 'Pool Name':
+            name = value
+        elif key == 'Available Capacity (GBs)' and name is not None:
+            pools[name] = float(value)
+    return pools
+
+
+class SnapshotSpaceCalculator(object):
+
+    """
+    Snapshot reserve needed by snappable model LUNs, from the capacities
+    of the SAN LUNs
+    """
+
+    def __init__(self, lun_capacities):
+        """
+        lun_capacities is a dict of LUN name to LunCapacity
+        """
+        self.luns = lun_capacities
+
+    @classmethod
+    def from_navi_luns(cls, navi_luns):
+        """
+        From a list of LUNs as listed by navi_get_luns or parse_lun_list
+        """
+        capacities = [LunCapacity.from_navi(lun) for lun in navi_luns]
+        return cls(dict((lun.name, lun) for lun in capacities))
+
+    @classmethod
+    def from_san(cls, context):
+        """
+        From one LUN listing of the SAN the test case is pointed at
+        """
+        return cls.from_navi_luns(context.navi_get_luns().values())
+
+    def get_lun_reserve(self, model_lun):
+        """
+        Snapshot reserve in GB needed by a lun-disk item, 0 if the plugin
+        does not snap it
+        """
+        if not is_snappable(model_lun):
+            return 0.0
+        lun = self.luns[model_lun.properties['lun_name']]
+        return lun.snap_base_gb * int(model_lun.properties['snap_size']) / 100
+
+    def get_pool_reserves(self, model_luns):
+        """
+        Dict of pool name to the snapshot reserve in GB needed in it by
+        the snappable lun-disk items in model_luns. Each LUN is counted
+        once, however many nodes it is shared between.
+        """
+        reserves = {}
+        seen = set()
+        for model_lun in model_luns:
+            name = model_lun.properties['lun_name']
+            if name in seen or not is_snappable(model_lun):
+                continue
+            seen.add(name)
+            pool = self.luns[name].pool
+            reserves[pool] = reserves.get(pool, 0.0) + \
+                self.get_lun_reserve(model_lun)
+        return reserves
+
+    def get_total_reserve(self, model_luns):
+        """
+        Snapshot reserve in GB needed by the snappable LUNs in all pools
+        """
+        return sum(self.get_pool_reserves(model_luns).values())
+
+
+class PoolPlan(object):
+
+    """
+    Snapshot reserve needed in a pool against the space available in it
+    """
+
+    def __init__(self, pool, available_gb, reserve_gb):
+        self.pool = pool
+        self.available_gb = available_gb
+        self.reserve_gb = reserve_gb
+
+    @property
+    def headroom_gb(self):
+        return self.available_gb - self.reserve_gb
+
+    @property
+    def ok(self):
+        return self.headroom_gb >= 0
+
+    def __str__(self):
+        return "%-30s %12.2f %12.2f %12.2f  %s" % (self.pool,
+                self.available_gb, self.reserve_gb, self.headroom_gb,
+                'OK' if self.ok else 'INSUFFICIENT')
+
+    def __repr__(self):
+        return self.__str__()
+
+
+def plan_snapshot_space(calculator, model_luns, pools):
+    """
+    A PoolPlan for each pool that snappable LUNs in model_luns are in.
+    pools is a dict of pool name to available capacity in GB; a pool
+    missing from it is taken to have no space.
+    """
+    reserves = calculator.get_pool_reserves(model_luns)
+    return [PoolPlan(pool, pools.get(pool, 0.0), reserve)
+            for pool, reserve in sorted(reserves.items())]
@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+
+"""
+DESCRIPTION:
+Run a test script of this directory in the directory's script worker.
+
+    run_in_worker.py <test id> [args...]
+    run_in_worker.py --stop
+
+Starts the worker if it is not running, has it run <test id>.py with the
+given arguments, prints the output of the script as it comes and exits
+with the exit status of the script. If no worker can be started the
+script is run in a new interpreter as before.
+"""
+
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from script_worker import (RC_MARKER, check_socket, get_scripts_dir,
+                           get_socket_path, is_serving)
+
+# Seconds to wait for a new worker to finish its imports and listen
+WORKER_START_TIMEOUT = 60
+
+
+def get_log_path(socket_path):
+    """
+    Log of the worker, next to its socket and private to the same user
+    """
+    return os.path.splitext(socket_path)[0] + '.log'
+
+
+def start_worker(scripts_dir, socket_path):
+    """
+    Start a worker detached from this process and wait for it to listen.
+    Clients starting at once may each start one; all but the first worker
+    to take the lock find the socket served and stop. Returns False if
+    the worker could not be started.
+    """
+    try:
+        log = os.open(get_log_path(socket_path),
+                      os.O_WRONLY | os.O_APPEND | os.O_CREAT | os.O_NOFOLLOW,
+                      0600)
+        try:
+            subprocess.Popen([sys.executable,
+                              os.path.join(scripts_dir, 'script_worker.py')],
+                             stdin=open(os.devnull), stdout=log, stderr=log,
+                             close_fds=True, preexec_fn=os.setsid)
+        finally:
+            os.close(log)
+    except (OSError, IOError) as error:
+        print "Could not start a script worker: %s" % error
+        return False
+    deadline = time.time() + WORKER_START_TIMEOUT
+    while time.time() < deadline:
+        if is_serving(socket_path):
+            return True
+        time.sleep(0.2)
+    return False
+
+
+def connect(socket_path):
+    check_socket(socket_path)
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    conn.connect(socket_path)
+    return conn
+
+
+def get_partial_marker(data):
+    """
+    Length of the end of data which could be the start of RC_MARKER
+    """
+    for length in range(min(len(data), len(RC_MARKER) - 1), 0, -1):
+        if RC_MARKER.startswith(data[-length:]):
+            return length
+    return 0
+
+
+def run_in_worker(socket_path, script, args):
+    """
+    Send the script to the worker and relay its output. Returns the exit
+    status of the script. Raises socket.error if the request could not be
+    sent, before the worker started the script.
+    """
+    conn = connect(socket_path)
+    request = {'script': script, 'args': args, 'cwd': os.getcwd(),
+               'env': dict(os.environ)}
+    try:
+        conn.sendall(json.dumps(request) + '\n')
+    except socket.error:
+        conn.close()
+        raise
+
+    # Output is passed on as it arrives. Only the exit status and an end
+    # of a chunk which could be the start of it are held back.
+    held = ''
+    try:
+        while RC_MARKER not in held:
+            chunk = conn.recv(65536)
+            if not chunk:
+                break
+            held += chunk
+            if RC_MARKER in held:
+                index = held.index(RC_MARKER)
+            else:
+                index = len(held) - get_partial_marker(held)
+            sys.stdout.write(held[:index])
+            sys.stdout.flush()
+            held = held[index:]
+        while True:
+            chunk = conn.recv(65536)
+            if not chunk:
+                break
+            held += chunk
+    except socket.error as error:
+        sys.stdout.write(held)
+        print "\nLost the worker running %s: %s" % (script, error)
+        return 1
+    finally:
+        conn.close()
+
+    index = held.rfind(RC_MARKER)
+    if index == -1:
+        sys.stdout.write(held)
+        print "\nWorker ended %s without an exit status" % script
+        return 1
+    sys.stdout.write(held[:index])
+    return int(held[index + len(RC_MARKER):].strip() or 1)
+
+
+def stop_worker(socket_path):
+    if not is_serving(socket_path):
+        print "No worker running"
+        return 0
+    conn = connect(socket_path)
+    conn.sendall('STOP\n')
+    conn.close()
+    print "Worker stopped"
+    return 0
+
+
+def main(argv):
+    if not argv:
+        print __doc__
+        return 2
+    scripts_dir = get_scripts_dir()
+    socket_path = get_socket_path(scripts_dir)
+    if argv[0] == '--stop':
+        return stop_worker(socket_path)
+
+    script, args = argv[0], argv[1:]
+    if is_serving(socket_path) or start_worker(scripts_dir, socket_path):
+        try:
+            return run_in_worker(socket_path, script, args)
+        except socket.error as error:
+            # The worker may have stopped since it was found serving
+            print "Script worker for %s not reachable: %s" % (scripts_dir,
+                                                              error)
+
+    print "No script worker for %s, running %s on its own" % (scripts_dir,
+                                                             script)
+    sys.stdout.flush()
+    return subprocess.call([sys.executable,
+                            os.path.join(scripts_dir, script + '.py')] + args)
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
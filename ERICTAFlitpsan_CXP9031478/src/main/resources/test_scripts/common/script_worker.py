@@ -0,0 +1,304 @@
+#!/usr/bin/env python
+
+"""
+DESCRIPTION:
+Long lived worker which runs the test scripts of one scripts directory.
+
+Starting a new interpreter for every test script spends seconds importing
+ptaf, infra_utils and paramiko before the test does anything. The worker
+imports them once and then waits on a unix socket for the name of a
+script to run. Each script runs in a child forked from the worker, so it
+starts with the imports already loaded but with a namespace, modules of
+its own directory and process state of its own, exactly as if it had been
+started on its own. Nothing a script does is seen by the scripts after it.
+
+The child sends what the script prints back over the socket as it runs,
+followed by the exit status of the script.
+
+The worker is started by run_in_worker.py when there is none, and stops
+when asked to or after WORKER_IDLE seconds without a script to run.
+"""
+
+import errno
+import fcntl
+import json
+import os
+import runpy
+import socket
+import stat
+import sys
+import tempfile
+import time
+import traceback
+
+# Modules imported by the worker so the scripts find them loaded
+WARM_MODULES = os.environ.get('LITPSAN_WORKER_MODULES', ' '.join([
+    'paramiko',
+    'ptaf.utils.cmd_utils',
+    'ptaf.utils.litp_cmd_utils',
+    'ptaf.utils.litp_utils.api_client',
+    'infra_utils.san_test',
+    'infra_utils.snap_test',
+    'infra_utils.restore_test',
+    'infra_utils.utils.enm_helpers',
+    'infra_utils.utils.san_utils',
+])).split()
+
+WORKER_IDLE = int(os.environ.get('LITPSAN_WORKER_IDLE', 30 * 60))
+
+# Separates the output of a script from its exit status on the socket
+RC_MARKER = '\0__rc__ '
+
+# How often the worker stops waiting for a connection to reap children
+# and check for idleness
+ACCEPT_TIMEOUT = 5
+
+
+def get_scripts_dir():
+    """
+    Directory the running script was started from. Not the directory of
+    this module, which is found through the symbolic link to it.
+    """
+    return os.path.dirname(os.path.abspath(sys.argv[0]))
+
+
+def get_socket_path(scripts_dir):
+    """
+    Socket of the worker for a scripts directory, one per user
+    """
+    return os.path.join(tempfile.gettempdir(), 'litpsan-worker-%d-%s.sock'
+                        % (os.getuid(), os.path.basename(scripts_dir)))
+
+
+def get_lock_path(socket_path):
+    """
+    Lock file held by a worker while it sets up its socket
+    """
+    return socket_path + '.lock'
+
+
+def check_socket(socket_path):
+    """
+    Raise socket.error unless socket_path is a socket owned by this user.
+    A client sends its whole environment to the worker, so it must never
+    talk to a file someone else left at the path.
+    """
+    try:
+        info = os.lstat(socket_path)
+    except OSError as error:
+        raise socket.error(error.errno, error.strerror)
+    if not stat.S_ISSOCK(info.st_mode) or info.st_uid != os.getuid():
+        raise socket.error(errno.EPERM, "%s is not a worker socket of this "
+                           "user" % socket_path)
+
+
+def encode(text):
+    """
+    JSON gives unicode strings, the scripts expect byte strings
+    """
+    return text.encode('utf-8')
+
+
+def read_request(conn):
+    """
+    The JSON request a client sends, ended by a newline
+    """
+    data = ''
+    while not data.endswith('\n'):
+        chunk = conn.recv(4096)
+        if not chunk:
+            break
+        data += chunk
+    return json.loads(data)
+
+
+def is_serving(socket_path):
+    """
+    Whether a worker answers on the socket
+    """
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        check_socket(socket_path)
+        client.connect(socket_path)
+    except socket.error:
+        return False
+    finally:
+        client.close()
+    return True
+
+
+def warm_up():
+    for name in WARM_MODULES:
+        try:
+            __import__(name)
+        except Exception as error:
+            print "Not preloading %s: %s" % (name, error)
+
+
+def run_script(scripts_dir, request):
+    """
+    Run the requested script in this process with its output sent to the
+    client, and return its exit status. Called in a forked child.
+    """
+    script = request['script']
+    if os.sep in script or script.startswith('.'):
+        print "Invalid script id %s" % script
+        return 2
+    path = os.path.join(scripts_dir, script + '.py')
+    if not os.path.isfile(path):
+        print "No script %s in %s" % (script, scripts_dir)
+        return 2
+
+    os.environ.clear()
+    os.environ.update((encode(key), encode(value))
+                      for key, value in request.get('env', {}).items())
+    os.chdir(encode(request.get('cwd', scripts_dir)))
+    sys.path.insert(0, scripts_dir)
+    sys.argv = [path] + [encode(arg) for arg in request.get('args', [])]
+    try:
+        runpy.run_path(path, run_name='__main__')
+    except SystemExit as exit:
+        if exit.code is None or isinstance(exit.code, int):
+            return exit.code or 0
+        print exit.code
+        return 1
+    except Exception:
+        traceback.print_exc()
+        return 1
+    return 0
+
+
+def serve_request(scripts_dir, conn):
+    """
+    Handle one client connection in a forked child. Never returns.
+    """
+    retcode = 1
+    try:
+        request = read_request(conn)
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        os.dup2(conn.fileno(), 1)
+        os.dup2(conn.fileno(), 2)
+        retcode = run_script(scripts_dir, request)
+    except BaseException:
+        traceback.print_exc()
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            conn.sendall('%s%d\n' % (RC_MARKER, retcode))
+        finally:
+            os._exit(0)
+
+
+def reap_children(children):
+    while children:
+        try:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+        except OSError as error:
+            if error.errno == errno.ECHILD:
+                children.clear()
+            return
+        if not pid:
+            return
+        children.discard(pid)
+
+
+def lock_socket(socket_path):
+    """
+    Take the lock on the socket of a scripts directory, released when the
+    returned descriptor is closed. Workers starting or stopping at the
+    same time take turns under it, so one never unlinks the socket
+    another has just bound.
+    """
+    lock = os.open(get_lock_path(socket_path),
+                   os.O_RDWR | os.O_CREAT | os.O_NOFOLLOW, 0600)
+    fcntl.flock(lock, fcntl.LOCK_EX)
+    return lock
+
+
+def listen(socket_path):
+    """
+    Bind and listen on socket_path, or return None if another worker
+    already serves it
+    """
+    lock = lock_socket(socket_path)
+    try:
+        if is_serving(socket_path):
+            return None
+        if os.path.lexists(socket_path):
+            os.unlink(socket_path)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0077)
+        try:
+            server.bind(socket_path)
+        finally:
+            os.umask(old_umask)
+        server.listen(16)
+        return server
+    finally:
+        os.close(lock)
+
+
+def serve(scripts_dir, socket_path):
+    """
+    Accept clients until stopped or idle
+    """
+    server = listen(socket_path)
+    if server is None:
+        print "A worker is already serving %s" % scripts_dir
+        return
+    server.settimeout(ACCEPT_TIMEOUT)
+    print "Worker %d serving %s on %s" % (os.getpid(), scripts_dir,
+                                          socket_path)
+
+    children = set()
+    last_used = time.time()
+    try:
+        while True:
+            reap_children(children)
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                if not children and time.time() - last_used > WORKER_IDLE:
+                    print "Worker idle, stopping"
+                    return
+                continue
+            conn.settimeout(None)
+            last_used = time.time()
+            first = conn.recv(1, socket.MSG_PEEK)
+            if first == 'S':
+                # A stop request, '{' starts a script request
+                conn.close()
+                print "Worker stopped"
+                return
+            if not first:
+                # A client checking the worker is up
+                conn.close()
+                continue
+            sys.stdout.flush()
+            pid = os.fork()
+            if pid == 0:
+                server.close()
+                serve_request(scripts_dir, conn)
+            children.add(pid)
+            conn.close()
+    finally:
+        lock = lock_socket(socket_path)
+        try:
+            server.close()
+            if os.path.lexists(socket_path):
+                os.unlink(socket_path)
+        finally:
+            os.close(lock)
+
+
+def main():
+    scripts_dir = get_scripts_dir()
+    warm_up()
+    serve(scripts_dir, get_socket_path(scripts_dir))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,150 @@
+"""
+DESCRIPTION:
+Concurrent removal of SAN snapshots for test case clean up.
+
+Removing the snapshots of a failed run one at a time takes minutes on a
+deployment with many LUNs. SnapshotCleanupMixin removes them a few at a
+time instead. The array only serves a limited number of management
+commands at once and answers the rest with a busy error, so the number of
+deletions in flight is bounded and a deletion refused as busy is retried
+after a pause. Once all deletions have run the snapshots are listed again
+to confirm none of them is left.
+
+Each thread deletes through its own copy of the test case with a CMDUtils
+of its own, so no two deletions share a connection to the array.
+"""
+
+import copy
+import os
+import re
+import threading
+import time
+
+from ptaf.utils.cmd_utils import CMDUtils
+
+from parallel import run_parallel
+
+# Deletions in flight at once, kept below the array's command limit
+SAN_MAX_PARALLEL = int(os.environ.get('LITPSAN_SAN_MAX_PARALLEL', 4))
+
+# Attempts per snapshot and the pause before the first retry, which
+# doubles for each retry after it
+DELETE_ATTEMPTS = 4
+RETRY_PAUSE = 5
+
+BUSY_PATTERN = re.compile(r'(?i)busy|in progress|try again|timed? ?out|'
+                          r'too many')
+
+
+class CleanupReport(object):
+
+    """
+    Outcome of removing a set of SAN snapshots. True when the final listing
+    shows none of them left.
+    """
+
+    def __init__(self, names):
+        self.names = names
+        self.failed = {}
+        self.remaining = []
+        self.duration = 0.0
+
+    def __nonzero__(self):
+        return not self.remaining
+
+    def __str__(self):
+        if self:
+            return "Removed %d snapshots in %.1fs" % (len(self.names),
+                                                       self.duration)
+        return "%d of %d snapshots left after clean up: %s" % (
+                len(self.remaining), len(self.names),
+                ', '.join(self.remaining))
+
+    def __repr__(self):
+        return self.__str__()
+
+
+def is_busy(output):
+    return BUSY_PATTERN.search(output or '') is not None
+
+
+class SnapshotCleanupMixin(object):
+
+    """
+    Gives a test case delete_san_snapshots, for removing many SAN
+    snapshots at once
+    """
+
+    def delete_san_snapshots(self, names, delete=None,
+                             max_workers=SAN_MAX_PARALLEL):
+        """
+        Remove the named snapshots with up to max_workers deletions at a
+        time, using delete(name), navi_delete_snapshot by default. Returns
+        a CleanupReport checked against a new listing of the snapshots.
+        delete may be a method of this test case, which each thread calls
+        on its own copy of it. Any other callable is called one snapshot
+        at a time.
+        """
+        names = sorted(set(names))
+        report = CleanupReport(names)
+        if not names:
+            return report
+        delete = delete or self.navi_delete_snapshot
+        if getattr(delete, '__self__', None) is not self:
+            max_workers = 1
+        local = threading.local()
+
+        def delete_one(name):
+            if max_workers == 1:
+                return self._delete_snapshot(delete, name)
+            test = getattr(local, 'test', None)
+            if test is None:
+                test = local.test = copy.copy(self)
+                test.cmd_utils = CMDUtils()
+            return self._delete_snapshot(getattr(test, delete.__name__),
+                                         name)
+
+        start = time.time()
+        self.info("Removing %d snapshots, %d at a time", len(names),
+                  max_workers)
+        results = run_parallel(names, delete_one, max_workers)
+        for result in results:
+            if not result.ok:
+                report.failed[result.item] = str(result.error)
+                self._logger.error("Removing snapshot %s failed: %s",
+                                   result.item, result.error)
+
+        listed = set(snap['Name'] for snap in self.navi_get_snapshots())
+        report.remaining = [name for name in names if name in listed]
+        report.duration = time.time() - start
+        if report:
+            self.info(str(report))
+        else:
+            self._logger.error(str(report))
+        return report
+
+    def _delete_snapshot(self, delete, name):
+        """
+        Delete one snapshot, retrying while the array reports it is busy
+        """
+        pause = RETRY_PAUSE
+        for attempt in range(1, DELETE_ATTEMPTS + 1):
+            try:
+                res = delete(name)
+            except Exception as error:
+                if attempt == DELETE_ATTEMPTS or not is_busy(str(error)):
+                    raise
+                output = str(error)
+            else:
+                retcode = getattr(res, 'retcode', 0)
+                if not retcode:
+                    return res
+                output = '%s %s' % (getattr(res, 'stdout', ''),
+                                    getattr(res, 'stderr', ''))
+                if attempt == DELETE_ATTEMPTS or not is_busy(output):
+                    raise Exception("retcode %s: %s" % (retcode,
+                                                         output.strip()))
+            self._logger.info("Array busy removing %s, retrying in %ds",
+                              name, pause)
+            time.sleep(pause)
+            pause *= 2
@@ -0,0 +1,209 @@
+"""
+DESCRIPTION:
+Set based comparison of the LUN snapshots on the SAN with the model.
+
+The SAN plugin names the snapshot of a LUN L_<lun name>_<snapshot name>,
+with an empty snapshot name for the default 'snapshot'. The expected names
+for the snappable LUNs in the model and the names of the snapshots on the
+SAN are both indexed once, so the whole comparison takes linear time and
+reports every problem it finds rather than stopping at the first one.
+
+SnapshotMatcher picks the snapshots of the model LUNs out of a full SAN
+snapshot listing in one pass, with a single compiled pattern for all the
+LUN names, rather than testing every snapshot name against every LUN.
+"""
+
+import re
+
+DEFAULT_SNAPSHOT = 'snapshot'
+
+
+def get_snap_suffix(snap_name):
+    """
+    The part of the SAN snapshot names that comes from the LITP snapshot
+    """
+    return '' if snap_name == DEFAULT_SNAPSHOT else snap_name
+
+
+def get_snap_name(lun_name, snap_name=DEFAULT_SNAPSHOT):
+    """
+    Name of the SAN snapshot of a LUN for a LITP snapshot
+    """
+    return '_'.join(['L', lun_name, get_snap_suffix(snap_name)])
+
+
+def get_lun_ids(context):
+    """
+    Dict of SAN LUN name to LUN ID, from one LUN listing
+    """
+    return dict((lun['Name'], str(lun_id))
+                for lun_id, lun in context.navi_get_luns().items())
+
+
+class SnapshotMatcher(object):
+
+    """
+    Matches SAN snapshot names against the snapshot names of a set of
+    LUNs. Without a snapshot name any L_<lun name>_ snapshot of the LUNs
+    matches, anywhere in the name; with one only the exact names of that
+    LITP snapshot match.
+    """
+
+    def __init__(self, lun_names, snap_name=None):
+        # Longest names first, so a LUN whose name starts with the name of
+        # another LUN is matched as itself
+        names = sorted(set(lun_names), key=len, reverse=True)
+        alternation = '|'.join(re.escape(name) for name in names)
+        if not names:
+            self.pattern = None
+        elif snap_name is None:
+            self.pattern = re.compile('L_(%s)_' % alternation)
+        else:
+            self.pattern = re.compile('^L_(%s)_%s$' % (alternation,
+                                      re.escape(get_snap_suffix(snap_name))))
+
+    @classmethod
+    def for_model(cls, model_luns, snap_name=None):
+        """
+        Matcher for the model lun-disk items in model_luns
+        """
+        return cls([lun.properties['lun_name'] for lun in model_luns],
+                   snap_name)
+
+    def match(self, name):
+        """
+        The name of the LUN the snapshot name is for, or None
+        """
+        if self.pattern is None:
+            return None
+        found = self.pattern.search(name)
+        return found.group(1) if found else None
+
+    def filter(self, navi_snaps):
+        """
+        The snapshots from navi_get_snapshots of the LUNs, in listing order
+        """
+        return [snap for snap in navi_snaps
+                if self.match(snap['Name']) is not None]
+
+    def classify(self, navi_snaps):
+        """
+        Dict of LUN name to its snapshots from navi_get_snapshots
+        """
+        by_lun = {}
+        for snap in navi_snaps:
+            lun_name = self.match(snap['Name'])
+            if lun_name is not None:
+                by_lun.setdefault(lun_name, []).append(snap)
+        return by_lun
+
+
+class SnapshotDiff(object):
+
+    """
+    Differences between the snapshots expected for the model LUNs and the
+    snapshots on the SAN. True when every expected snapshot exists on its
+    own LUN.
+
+    missing        expected snapshot names not on the SAN
+    wrong_source   (snapshot name, expected LUN ID, SAN source LUN ID)
+                   of expected snapshots taken of another LUN
+    unexpected     snapshots named for this LITP snapshot on model LUNs
+                   which no model LUN expects. Reported only, as they do
+                   not show a problem with the snapshot being verified.
+    """
+
+    def __init__(self, missing, wrong_source, unexpected):
+        self.missing = sorted(missing)
+        self.wrong_source = sorted(wrong_source)
+        self.unexpected = sorted(unexpected)
+
+    def __nonzero__(self):
+        return not (self.missing or self.wrong_source)
+
+    def report(self):
+        """
+        Lines describing each difference, for the test log
+        """
+        lines = ["Missing snapshot %s" % name for name in self.missing]
+        lines.extend("Snapshot %s is of LUN %s, expected LUN %s" % (name,
+                     source, expected)
+                     for name, expected, source in self.wrong_source)
+        lines.extend("Unexpected snapshot %s" % name
+                     for name in self.unexpected)
+        return lines
+
+    def __str__(self):
+        return '\n'.join(self.report()) or 'No snapshot differences'
+
+    def __repr__(self):
+        return self.__str__()
+
+
+def diff_snapshots(navi_snaps, model_luns, lun_ids, snap_name):
+    """
+    Compare the SAN snapshots from navi_get_snapshots with those expected
+    for the model lun-disk items in model_luns. lun_ids is a dict of LUN
+    name to SAN LUN ID.
+    """
+    # expected snapshot name -> LUN ID of the LUN it should be a snap of
+    expected = {}
+    for lun in model_luns:
+        lun_name = lun.properties['lun_name']
+        expected[get_snap_name(lun_name, snap_name)] = lun_ids.get(lun_name)
+    model_lun_ids = set(expected.values())
+
+    # SAN snapshot name -> source LUN ID
+    on_san = dict((snap['Name'], str(snap['Source LUN(s)']).strip())
+                  for snap in navi_snaps)
+
+    missing = set(expected) - set(on_san)
+    wrong_source = [(name, expected[name], on_san[name])
+                    for name in set(expected) & set(on_san)
+                    if expected[name] is not None
+                    and on_san[name] != expected[name]]
+
+    suffix = '_' + get_snap_suffix(snap_name)
+    unexpected = [name for name, source in on_san.items()
+                  if name not in expected and name.startswith('L_')
+                  and name.endswith(suffix) and source in model_lun_ids]
+    return SnapshotDiff(missing, wrong_source, unexpected)
+
+
+class SnapshotCheckMixin(object):
+
+    """
+    Replaces SnapTest.verify_snapshot_creation with a set based check
+    which logs every difference it finds. Mix in before SnapTest.
+    """
+
+    # Dict of SAN LUN name to LUN ID, once listed
+    _san_lun_ids = None
+
+    def get_lun_ids(self):
+        """
+        Dict of SAN LUN name to LUN ID, listed from the SAN on first use
+        only and shared by every verification and everything else in the
+        test case that needs it
+        """
+        if self._san_lun_ids is None:
+            self._san_lun_ids = get_lun_ids(self)
+        return self._san_lun_ids
+
+    def verify_snapshot_creation(self, navi_snaps, model_snaps,
+                                 snap_name=DEFAULT_SNAPSHOT):
+        """
+        Returns a SnapshotDiff which is true if every snappable LUN in
+        model_snaps has its snapshot for the LITP snapshot snap_name in
+        navi_snaps, the listing from navi_get_snapshots
+        """
+        diff = diff_snapshots(navi_snaps, model_snaps, self.get_lun_ids(),
+                              snap_name)
+        self.info('Verified %d snapshots against %d on the SAN',
+                  len(model_snaps), len(navi_snaps))
+        for line in diff.report():
+            if diff:
+                self._logger.warning(line)
+            else:
+                self._logger.error(line)
+        return diff
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+
+"""
+DESCRIPTION:
+Predict whether 'litp create_snapshot' will pass the pool reserve checks of
+the SAN plugin, from captured data only, before the snapshot is needed.
+
+Run on any host with python, with:
+    --model  a LITP model export ('litp export -p / -f model.xml')
+    --luns   the output of 'naviseccli ... lun -list'
+    --pools  the output of 'naviseccli ... storagepool -list'
+
+Prints the snapshot reserve needed in each pool against the space available
+in it. The exit status is 0 if every pool has room, 1 if any does not.
+"""
+
+import argparse
+import sys
+import xml.etree.ElementTree as ElementTree
+
+from pool_capacity import (SnapshotSpaceCalculator, is_snappable,
+                           parse_lun_list, parse_pool_list,
+                           plan_snapshot_space)
+
+# Values used by the plugin for properties left out of the model
+LUN_DISK_DEFAULTS = {
+    'external_snap': 'false',
+    'snap_size': '0',
+}
+
+
+class ModelLun(object):
+
+    """
+    A lun-disk item read from a model export, with the properties
+    attribute of a LitpClient item
+    """
+
+    def __init__(self, properties):
+        self.properties = properties
+
+    def __repr__(self):
+        return repr(self.properties)
+
+
+def get_local_name(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def parse_model(path):
+    """
+    The lun-disk items, including inherited ones, of a LITP model export
+    """
+    luns = []
+    for element in ElementTree.parse(path).iter():
+        if get_local_name(element.tag) not in ('lun-disk',
+                                               'lun-disk-inherit'):
+            continue
+        properties = dict(LUN_DISK_DEFAULTS)
+        properties.update((get_local_name(child.tag),
+                          (child.text or '').strip()) for child in element)
+        if properties.get('lun_name'):
+            luns.append(ModelLun(properties))
+    return luns
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Predict whether '
+            'create_snapshot will find enough space in the storage pools')
+    parser.add_argument('--model', required=True,
+                        help='LITP model export (XML)')
+    parser.add_argument('--luns', required=True,
+                        help="output of 'naviseccli lun -list'")
+    parser.add_argument('--pools', required=True,
+                        help="output of 'naviseccli storagepool -list'")
+    args = parser.parse_args(argv)
+
+    model_luns = parse_model(args.model)
+    with open(args.luns) as handle:
+        calculator = SnapshotSpaceCalculator.from_navi_luns(
+                parse_lun_list(handle.read()))
+    with open(args.pools) as handle:
+        pools = parse_pool_list(handle.read())
+
+    missing = sorted(set(lun.properties['lun_name'] for lun in model_luns
+                         if is_snappable(lun)) - set(calculator.luns))
+    if missing:
+        print "Snappable LUNs not found on the SAN: %s" % ', '.join(missing)
+        return 1
+
+    plans = plan_snapshot_space(calculator, model_luns, pools)
+    print "%-30s %12s %12s %12s" % ('Pool', 'Available GB', 'Reserve GB',
+                                    'Headroom GB')
+    for plan in plans:
+        print plan
+    if all(plan.ok for plan in plans):
+        print "create_snapshot should pass the pool reserve checks"
+        return 0
+    print "create_snapshot will fail the pool reserve checks"
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
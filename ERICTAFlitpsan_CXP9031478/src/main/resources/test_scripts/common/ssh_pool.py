@@ -0,0 +1,267 @@
+"""
+DESCRIPTION:
+SSH connections shared between commands.
+
+CMDUtils opens a new SSH session, with a full handshake, for every command
+it runs. PooledCMDUtils is a drop in replacement which keeps one connection
+per (host, user) open for the life of the test case and runs each command
+on a new channel of that connection. Connections to the peer nodes are
+tunnelled through the pooled connection to the MS.
+
+The pool counts how many connections it opened and how often it reused one,
+along with the time spent in handshakes, so the saving can be reported.
+"""
+
+import pipes
+import socket
+import threading
+import time
+
+import paramiko
+
+from ptaf.utils.cmd_utils import CMDUtils
+
+SSH_PORT = 22
+
+# Seconds to wait for su to prompt for the root password
+PROMPT_TIMEOUT = 30
+
+# Bytes read from a channel at a time, and seconds to wait between reads
+# when neither of its streams has data
+READ_SIZE = 32768
+POLL_INTERVAL = 0.01
+
+
+class CmdResult(object):
+
+    """
+    Result of a command run over a pooled connection, with the same
+    attributes as the results returned by CMDUtils
+    """
+
+    def __init__(self, stdout, stderr, retcode):
+        self.stdout = stdout
+        self.stderr = stderr
+        self.retcode = retcode
+
+    def __str__(self):
+        return "retcode: %s stdout: %s stderr: %s" % (self.retcode,
+                self.stdout, self.stderr)
+
+    def __repr__(self):
+        return self.__str__()
+
+
+def clean_output(output):
+    """
+    Command output in the form CMDUtils gives it: unix line endings and no
+    leading or trailing whitespace
+    """
+    return output.replace('\r\n', '\n').replace('\r', '').strip()
+
+
+def read_streams(channel):
+    """
+    Read stdout and stderr of a channel together until the command has
+    closed them. Reading one to its end before the other would leave a
+    command that fills the window of the other blocked for ever.
+    """
+    stdout = []
+    stderr = []
+    while True:
+        idle = True
+        if channel.recv_ready():
+            stdout.append(channel.recv(READ_SIZE))
+            idle = False
+        if channel.recv_stderr_ready():
+            stderr.append(channel.recv_stderr(READ_SIZE))
+            idle = False
+        if idle:
+            # EOF comes after the last of the data of both streams
+            if channel.eof_received or channel.closed:
+                if not (channel.recv_ready() or channel.recv_stderr_ready()):
+                    break
+            else:
+                time.sleep(POLL_INTERVAL)
+    return ''.join(stdout), ''.join(stderr)
+
+
+class SSHPool(object):
+
+    """
+    Open SSH connections keyed by (host, user), optionally tunnelled
+    through another pooled connection
+    """
+
+    def __init__(self):
+        self._connections = {}
+        self._key_locks = {}
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.reused = 0
+        self.handshake_time = 0.0
+
+    def get(self, host, user, password, via=None):
+        """
+        Returns a connected paramiko.SSHClient for user@host, opening one
+        only if there is no live connection for it already. via is the key
+        of a pooled connection to tunnel through.
+        """
+        key = (host, user) if via is None else (host, user, via)
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Only commands for the same connection wait on each other here,
+        # so handshakes to different hosts can run in parallel
+        with key_lock:
+            client = self._connections.get(key)
+            transport = client.get_transport() if client else None
+            if transport is not None and transport.is_active():
+                with self._lock:
+                    self.reused += 1
+                return client
+
+            sock = None
+            if via is not None:
+                via_transport = self._connections[via].get_transport()
+                sock = via_transport.open_channel('direct-tcpip',
+                        (host, SSH_PORT), ('127.0.0.1', 0))
+
+            start = time.time()
+            client = paramiko.SSHClient()
+            client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            client.connect(host, username=user, password=password, sock=sock,
+                           look_for_keys=False, allow_agent=False)
+            with self._lock:
+                self.handshake_time += time.time() - start
+                self.opened += 1
+            self._connections[key] = client
+            return client
+
+    def stats(self):
+        """
+        Connection reuse counters for reporting
+        """
+        return {
+            'opened': self.opened,
+            'reused': self.reused,
+            'handshake_time': self.handshake_time,
+        }
+
+    def summary(self):
+        """
+        Connection reuse counters as a line for the test log
+        """
+        return ("SSH connections opened: %d, reused: %d, "
+                "handshake time: %.2fs" % (self.opened, self.reused,
+                self.handshake_time))
+
+    def close_all(self):
+        """
+        Close every pooled connection, tunnelled ones first
+        """
+        with self._lock:
+            keys = sorted(self._connections, key=len, reverse=True)
+            for key in keys:
+                self._connections.pop(key).close()
+
+
+class PooledCMDUtils(CMDUtils):
+
+    """
+    CMDUtils which runs its SSH commands over pooled connections
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(PooledCMDUtils, self).__init__(*args, **kwargs)
+        self.ssh_pool = SSHPool()
+
+    def run_ssh_command(self, cmd, host, user, password, **kwargs):
+        """
+        Run a command on host as user over a pooled connection
+        """
+        if kwargs:
+            return super(PooledCMDUtils, self).run_ssh_command(cmd, host,
+                    user, password, **kwargs)
+        client = self.ssh_pool.get(host, user, password)
+        return self._exec(client, cmd)
+
+    def run_ssh_command_via_proxy(self, cmd, ms_ip, ms_user, ms_pass, node,
+                                  node_user, node_pass, **kwargs):
+        """
+        Run a command on a peer node, tunnelled through the MS
+        """
+        if kwargs:
+            return super(PooledCMDUtils, self).run_ssh_command_via_proxy(cmd,
+                    ms_ip, ms_user, ms_pass, node, node_user, node_pass,
+                    **kwargs)
+        client = self._get_node_client(ms_ip, ms_user, ms_pass, node,
+                                       node_user, node_pass)
+        return self._exec(client, cmd)
+
+    def run_ssh_command_as_root_via_proxy(self, cmd, ms_ip, ms_user, ms_pass,
+                                          node, node_user, node_pass,
+                                          root_pass, **kwargs):
+        """
+        Run a command as root on a peer node, tunnelled through the MS.
+        The node does not allow root logins, so the command is run through
+        su on a pty using the root password.
+        """
+        if kwargs:
+            return super(PooledCMDUtils,
+                    self).run_ssh_command_as_root_via_proxy(cmd, ms_ip,
+                    ms_user, ms_pass, node, node_user, node_pass, root_pass,
+                    **kwargs)
+        client = self._get_node_client(ms_ip, ms_user, ms_pass, node,
+                                       node_user, node_pass)
+        return self._exec_as_root(client, cmd, root_pass)
+
+    def _get_node_client(self, ms_ip, ms_user, ms_pass, node, node_user,
+                         node_pass):
+        self.ssh_pool.get(ms_ip, ms_user, ms_pass)
+        return self.ssh_pool.get(node, node_user, node_pass,
+                                 via=(ms_ip, ms_user))
+
+    def _exec(self, client, cmd):
+        channel = client.get_transport().open_session()
+        try:
+            channel.exec_command(cmd)
+            stdout, stderr = read_streams(channel)
+            retcode = channel.recv_exit_status()
+        finally:
+            channel.close()
+        return CmdResult(clean_output(stdout), clean_output(stderr), retcode)
+
+    def _exec_as_root(self, client, cmd, root_pass):
+        """
+        The pty carries stdout and stderr together, so both are returned
+        as stdout, with the echo of the password line removed
+        """
+        channel = client.get_transport().open_session()
+        try:
+            channel.get_pty()
+            channel.exec_command("su root -c %s" % pipes.quote(cmd))
+            channel.settimeout(PROMPT_TIMEOUT)
+            output = ''
+            try:
+                while 'assword:' not in output:
+                    data = channel.recv(1024)
+                    if not data:
+                        break
+                    output += data
+            except socket.timeout:
+                pass
+            if 'assword:' not in output:
+                return CmdResult('', "su gave no password prompt: %s" %
+                                 clean_output(output), 1)
+            channel.settimeout(None)
+            channel.sendall(root_pass + '\n')
+            stdout = channel.makefile('rb').read()
+            retcode = channel.recv_exit_status()
+        finally:
+            channel.close()
+        lines = stdout.replace('\r\n', '\n').split('\n')
+        # The pty echoes the line sent with the password
+        if lines and lines[0].strip('\r') in ('', root_pass):
+            lines = lines[1:]
+        return CmdResult(clean_output('\n'.join(lines)), '', retcode)
@@ -0,0 +1,72 @@
+"""
+DESCRIPTION:
+Waiting for a condition rather than for a guessed length of time.
+
+wait_until checks a condition straight away and then at intervals which
+grow from interval up to max_interval, until the condition holds or the
+deadline passes. Every wait is timed and kept in wait_history, so the
+test log shows how long the array actually took.
+"""
+
+import time
+
+# Timing record of every wait_until call made by this process
+wait_history = []
+
+
+class WaitTimeout(Exception):
+    pass
+
+
+class WaitRecord(object):
+
+    """
+    How long one wait_until call took and how many checks it made
+    """
+
+    def __init__(self, description):
+        self.description = description
+        self.checks = 0
+        self.elapsed = 0.0
+        self.met = False
+
+    def __str__(self):
+        return "%s %s after %.1fs, %d checks" % (self.description,
+                'met' if self.met else 'timed out', self.elapsed,
+                self.checks)
+
+    def __repr__(self):
+        return self.__str__()
+
+
+def wait_until(condition, timeout, interval=1, max_interval=30, backoff=2,
+               description=None, logger=None):
+    """
+    Calls condition() until it returns a true value and returns that
+    value. The wait between calls starts at interval and is multiplied by
+    backoff after each call, up to max_interval. Raises WaitTimeout if the
+    condition does not hold within timeout seconds.
+    """
+    record = WaitRecord(description or getattr(condition, '__name__',
+                                                'condition'))
+    wait_history.append(record)
+    start = time.time()
+    deadline = start + timeout
+    while True:
+        record.checks += 1
+        value = condition()
+        record.elapsed = time.time() - start
+        if value:
+            record.met = True
+            break
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            break
+        time.sleep(min(interval, remaining))
+        interval = min(interval * backoff, max_interval)
+
+    if logger is not None:
+        logger.info(str(record))
+    if not record.met:
+        raise WaitTimeout(str(record))
+    return value
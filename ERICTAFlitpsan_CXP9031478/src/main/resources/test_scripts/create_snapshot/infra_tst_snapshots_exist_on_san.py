@@ -10,8 +10,9 @@ TORF-93743
 """
 
 from infra_utils.snap_test import SnapTest
+from snapshot_index import DEFAULT_SNAPSHOT, SnapshotCheckMixin
 
-class TestCase(SnapTest):
+class TestCase(SnapshotCheckMixin, SnapTest):
 
     """
     Test case to verify snapshots exist on SAN after upgrade
@@ -38,7 +39,8 @@ class TestCase(SnapTest):
         navi_snaps = self.navi_get_snapshots()
         self.info('Verifying a snap exists for each lun to be snapped by SAN')
         self.assertTrue(self.verify_snapshot_creation(navi_snaps,
-                                                      luns_to_be_snapped))
+                                                      luns_to_be_snapped,
+                                                      DEFAULT_SNAPSHOT))
 
 
 if __name__ == '__main__':
@@ -0,0 +1 @@
+../common/script_worker.py
\ No newline at end of file
@@ -0,0 +1 @@
+../common/snapshot_index.py
\ No newline at end of file
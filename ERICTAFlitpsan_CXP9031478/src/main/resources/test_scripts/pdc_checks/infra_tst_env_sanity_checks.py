@@ -2,7 +2,17 @@
 from infra_utils.san_test import SanTest
 from ptaf.utils.litp_cmd_utils import LitpUtils
 from ptaf.utils.litp_utils.api_client import LitpClient
-from ptaf.utils.cmd_utils import CMDUtils
+from ssh_pool import PooledCMDUtils
+
+# RPMs to report the versions of, as (key name, rpm search name)
+TRACKED_PACKAGES = [
+    ("SAN PSL", "ERIClitpsanemc_"),
+    ("SAN Plugin", "ERIClitpsan_"),
+    ("SAN API", "ERIClitpsanapi_"),
+    ("Naviseccli", "NaviCLI"),
+    ("ENMinst", "ERICenminst_"),
+    ("Deployment Description", "ERICenmdeploymenttemplates_"),
+]
 
 class TestCase(SanTest):
 
@@ -33,8 +43,9 @@ class TestCase(SanTest):
 
         self.litp_utils = LitpUtils()
 
-        # Create instance of CMDUtils to run popen cmds on the MS
-        self.cmd_utils = CMDUtils()
+        # Create instance of CMDUtils to run cmds on the MS, all of them
+        # share one SSH connection
+        self.cmd_utils = PooledCMDUtils()
         self.navi_target = self.mws
 
 
@@ -42,6 +53,8 @@ class TestCase(SanTest):
         """
         Clean up after the test case
         """
+        self.info(self.cmd_utils.ssh_pool.summary())
+        self.cmd_utils.ssh_pool.close_all()
         super(TestCase, self).tearDown()
 
     def test(self):
@@ -79,27 +92,34 @@ class TestCase(SanTest):
 
 
         # Interrogates the MS for RPM's and their Versions
-        self.get_version_information("SAN PSL", "ERIClitpsanemc_")
-        self.get_version_information("SAN Plugin", "ERIClitpsan_")
-        self.get_version_information("SAN API", "ERIClitpsanapi_")
-        self.get_version_information("Naviseccli", "NaviCLI")
-        self.get_version_information("ENMinst", "ERICenminst_")
-        self.get_version_information("Deployment Description", "ERICenmdeploymenttemplates_")
+        self.env_versions.update(self.get_version_information(TRACKED_PACKAGES))
 
         # Prints out the versions
         self.print_version_details()
 
-    def get_version_information(self, key_name, rpm_search_name ):
+    def get_version_information(self, packages):
         """
-        Contacts the model to retrieve the version information from the rpms.
-        Checks that the command returns the correct information
-        the version information of the rpms is then stored in a dictionary
+        Contacts the MS to retrieve the version information from the rpms.
+        packages is a list of (key name, rpm search name) pairs, all of
+        them are queried in a single rpm command which outputs one
+        name=version line per installed rpm.
+        Returns a dictionary of '<key name> Version' to the version of
+        the rpm(s) whose name starts with the search name
         """
-
-        cmd = self.cmd_utils.run_ssh_command("rpm -qa | grep -i " + rpm_search_name, self.navi_target['ip'], 'root', self.navi_target['root_password'])
-        # Checks to see that the rpm searched for is what is returned in the cmd
-        prod_version = self.cmd_utils.run_ssh_command("rpm -q --qf '%{VERSION}\n' " + cmd.stdout, self.navi_target['ip'], 'root', self.navi_target['root_password'])
-        self.env_versions[key_name + " Version"] = prod_version.stdout
+        patterns = ' '.join("'%s*'" % search_name
+                            for _, search_name in packages)
+        cmd = self.cmd_utils.run_ssh_command(
+            "rpm -qa --qf '%{NAME}=%{VERSION}\\n' " + patterns,
+            self.navi_target['ip'], 'root', self.navi_target['root_password'])
+        installed = [line.split('=', 1) for line in cmd.stdout.splitlines()
+                     if '=' in line]
+
+        versions = {}
+        for key_name, search_name in packages:
+            found = [version for name, version in installed
+                     if name.lower().startswith(search_name.lower())]
+            versions[key_name + " Version"] = ', '.join(found) or 'Not installed'
+        return versions
 
     def print_version_details(self):
         """
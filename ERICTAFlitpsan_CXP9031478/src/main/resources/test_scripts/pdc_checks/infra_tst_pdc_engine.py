@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+
+"""
+DESCRIPTION:
+Run the post deployment checks in a single process
+
+The LITP model and the SAN inventory are loaded once and every registered
+check runs against them. With no arguments the engine runs every check and
+persists the outcome on the MS. With '--check <test id>' it reports the
+outcome of that one check from that run, so each check keeps its own
+result in TAF; it fails if the engine has not run for this suite run.
+"""
+
+import errno
+import importlib
+import os
+import sys
+import time
+import traceback
+
+from pdc_test import PdcTest
+from san_inventory import (INVENTORY_TTL, STATE_DIR, read_record,
+                           write_record)
+
+RESULTS_FILE = os.path.join(STATE_DIR, 'pdc_engine_results.pkl')
+
+# The checks run by the engine, in the order they are run
+CHECKS = (
+    'infra_tst_san_verify_lun_names',
+    'infra_tst_san_verify_boot_lun_sizes',
+    'infra_tst_san_verify_lun_uuids',
+    'infra_tst_san_verify_lun_container',
+    'infra_tst_san_verify_lun_sgs',
+    'infra_tst_san_verify_host_reg_sg',
+    'infra_tst_san_verify_nonboot_lun_sizes',
+)
+
+
+class TestCase(PdcTest):
+
+    """
+    Test case to run every registered post deployment check against one
+    shared LITP model and SAN inventory
+    """
+
+    # Set from '--check <test id>' on the command line
+    check_id = None
+
+    def test(self):
+        """
+        Test case implementation
+        """
+        if self.check_id is None:
+            self.run_checks()
+            return
+
+        if self.check_id not in CHECKS:
+            self.fail("Check %s is not registered with the PDC engine"
+                      % self.check_id)
+        results = self.read_results()
+        if results is None:
+            self.fail("PDC engine results missing for this suite run, "
+                      "run_engine must run before check %s" % self.check_id)
+        result = results[self.check_id]
+        self.info("Check %s %s in %.1fs", self.check_id,
+                  'passed' if result['passed'] else 'failed',
+                  result['duration'])
+        if not result['passed']:
+            self.fail(result['message'])
+
+    def run_checks(self):
+        """
+        Load the model and SAN inventory once, run every registered check
+        against them and persist the outcome for the per check reports
+        """
+        # A new engine run starts from a fresh SAN capture and
+        # never reports an outcome from a previous run
+        try:
+            os.remove(RESULTS_FILE)
+        except OSError as error:
+            if error.errno != errno.ENOENT:
+                raise
+        self.san_inventory.invalidate()
+
+        self.get_model()
+        self.info("Loaded %d LUNs and %d storage groups from the SAN",
+                  len(self.san_inventory.luns), len(self.san_inventory.sgs))
+
+        results = {}
+        for check_id in CHECKS:
+            results[check_id] = self.run_check(check_id)
+
+        write_record(RESULTS_FILE, {
+            'fingerprint': self.san_inventory.fingerprint,
+            'captured': time.time(),
+            'results': results,
+        })
+
+        for check_id in CHECKS:
+            result = results[check_id]
+            self.info("%-45s %s %6.1fs", check_id,
+                      'PASS' if result['passed'] else 'FAIL',
+                      result['duration'])
+        return results
+
+    def run_check(self, check_id):
+        """
+        Run one check in this process, sharing this test case's state so
+        it uses the already loaded model and SAN inventory
+        """
+        self.info("Running check %s", check_id)
+        check = importlib.import_module(check_id).TestCase()
+        check.__dict__.update(self.__dict__)
+
+        start = time.time()
+        passed = False
+        try:
+            check.test()
+            passed = True
+            message = ''
+        except AssertionError as error:
+            # bare assert statements carry no message, use the traceback
+            message = str(error) or traceback.format_exc()
+        except Exception:
+            message = traceback.format_exc()
+        if not passed:
+            self._logger.error("Check %s failed: %s", check_id, message)
+
+        return {
+            'passed': passed,
+            'message': message,
+            'duration': time.time() - start,
+        }
+
+    def read_results(self):
+        """
+        Returns the outcome of the engine run for this suite run, or None
+        if there is no usable one
+        """
+        record = read_record(RESULTS_FILE)
+        if record is None:
+            return None
+        if record.get('fingerprint') != self.san_inventory.fingerprint:
+            return None
+        if time.time() - record.get('captured', 0) > INVENTORY_TTL:
+            return None
+        return record['results']
+
+
+if __name__ == '__main__':
+    if '--check' in sys.argv:
+        index = sys.argv.index('--check')
+        TestCase.check_id = sys.argv[index + 1]
+        del sys.argv[index:index + 2]
+    TestCase().run_test()
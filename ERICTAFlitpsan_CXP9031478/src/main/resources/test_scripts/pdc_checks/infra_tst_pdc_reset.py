@@ -0,0 +1,28 @@
+#!/usr/bin/env python
+
+"""
+DESCRIPTION:
+Drop any SAN inventory left on the MS by a previous run of the post
+deployment checks, so the checks that follow capture a fresh one.
+Run on its own before any of the checks of the suite.
+"""
+
+from pdc_test import PdcTest
+
+
+class TestCase(PdcTest):
+
+    """
+    Test case to reset the state shared by the post deployment checks
+    """
+
+    def test(self):
+        """
+        Test case implementation
+        """
+        self.info('Discarding the SAN inventory of any previous run')
+        self.san_inventory.invalidate()
+
+
+if __name__ == '__main__':
+    TestCase().run_test()
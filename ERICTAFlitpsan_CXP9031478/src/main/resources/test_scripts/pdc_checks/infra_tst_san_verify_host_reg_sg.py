@@ -14,15 +14,11 @@ Checks:
 2) Each wwn defined in the model is registered to correct port for correct storage group
 """
 
-from infra_utils.san_test import SanTest
-from ptaf.utils.litp_cmd_utils import LitpUtils
-from ptaf.utils.litp_utils.api_client import LitpClient
-from infra_utils.utils.enm_helpers import Model
+from pdc_test import PdcTest
 from ptaf.utils.dmt_utils import DMTUtils
 
-from ptaf.utils.model_utils import ModelUtils
 
-class TestCase(SanTest):
+class TestCase(PdcTest):
 
     """
     Test case to verify that there is a Storage Group on the SAN corresponding to each node in the model and
@@ -30,31 +26,17 @@ class TestCase(SanTest):
     http://taftm.lmera.ericsson.se/#tm/viewTC/7386/version/1
     """
 
-    def setUp(self):
-        """
-        Set up the test case
-        """
-        super(TestCase, self).setUp()
-
-        self.litp_utils = LitpUtils()
-        self.model_utils = ModelUtils()
-        self.navi_target = self.mws
-        #self.dmt_utils = DMTUtils()
-
-    def tearDown(self):
-        """
-        Clean up after the test case
-        """
-        super(TestCase, self).tearDown()
-
     def test(self):
         """
         Test case implementation
         """
         # GET LITP Model INFORMATION
-        litp_pass = self.litp_utils.get_litpadmin_password(self)
-        client = LitpClient(host=self.mws['ip'],password=litp_pass)
-        model = Model(client)
+        model = self.get_model()
+
+        # GET ALL STORAGE GROUPS FROM THE SAN ONCE, INDEXED BY NAME, WITH
+        # THE WWNS REGISTERED TO EACH
+        san_sgs = self.san_inventory.get_sgs_by_name()
+        san_sg_wwns = self.san_inventory.get_sg_wwns()
 
         # get site ID and pool name for deployment from SED, either could be
         # the first part of SG name
@@ -94,49 +76,32 @@ class TestCase(SanTest):
 
             # Iterate through each Storage group in the model
             for lun_name in node_sgs.keys():
-                # call navisec to check that the storage group exists on the SAN
+                # check that the storage group exists on the SAN
                 possible_sgs = node_sgs[lun_name]
                 site_id_sg = possible_sgs[0]
                 pool_name_sg = possible_sgs[1]
 
-                # one of these possible SGS should exist
-                found_site_id_sg = self.navi_get_sg(site_id_sg)
-                found_pool_name_sg = self.navi_get_sg(pool_name_sg)
-                # if both don't exist, error
-                if found_site_id_sg == {} and found_pool_name_sg == {}:
-                    self._logger.error("Neither storage group " +\
-                      "'{0}' nor '{1}' exist on the SAN for node '{2}'".format(
-                      found_site_id_sg, found_pool_name_sg, node))
+                # one of these possible SGS should exist, set the model sg
+                # as whichever one was a real sg
+                if site_id_sg in san_sgs:
+                    model_sg = site_id_sg
+                elif pool_name_sg in san_sgs:
+                    model_sg = pool_name_sg
                 else:
-                    # set the model sg as whichever one was a real sg
-                    if found_site_id_sg != {}:
-                        san_sg = found_site_id_sg
-                        model_sg = site_id_sg
-                    else:
-                        san_sg = found_pool_name_sg
-                        model_sg = pool_name_sg
-                #Assert model SG equals what was returned by the navi call
-                self.assertEqual(san_sg['Storage Group Name'], model_sg)
-
-                #Get WWNs from the SAN
-                wwn_list = []
-                for hba in san_sg['HBA UID']:
-                    wwn = hba[0]
-                    wwn1 = str(wwn[:len(wwn)/2])
-                    wwn2 = str(wwn[(len(wwn)/2)+1:])
-                    wwn_list.append(wwn1)
-                    wwn_list.append(wwn2)
+                    # if both don't exist, error
+                    self.fail("Neither storage group " +\
+                      "'{0}' nor '{1}' exist on the SAN for node '{2}'".format(
+                      site_id_sg, pool_name_sg, node))
 
                 # Check that at least 1 wwn exists in SG
                 wwn_exists=False
                 for wwn in node_wwns:
-                    if wwn in wwn_list:
+                    if wwn in san_sg_wwns[model_sg]:
                         wwn_exists=True
                         self.info("WWN %s exists on SAN for node %s: True" % (wwn, node))
                     else:
                         self.info("WWN %s exists on SAN for node %s: False" % (wwn, node))
                 self.assertEqual(wwn_exists, True)
-                san_sg=None
 
         self.info("Test Completed Successfully")
 
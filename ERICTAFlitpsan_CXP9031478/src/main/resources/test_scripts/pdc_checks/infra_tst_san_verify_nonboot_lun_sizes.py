@@ -7,46 +7,25 @@ Verify the LUNs defined in the LITP model exist on the storage array
 and are in 'Ready' state
 """
 
-from infra_utils.san_test import SanTest
-from ptaf.utils.litp_cmd_utils import LitpUtils
-from ptaf.utils.litp_utils.api_client import LitpClient
-from infra_utils.utils.enm_helpers import Model
+from pdc_test import PdcTest
 
 
-class TestCase(SanTest):
+class TestCase(PdcTest):
 
     """
     Test case to verify LUNs defined in the model
     """
 
-    def setUp(self):
-        """
-        Set up the test case
-        """
-        super(TestCase, self).setUp()
-
-        self.litp_utils = LitpUtils()
-        self.navi_target = self.mws
-
-    def tearDown(self):
-        """
-        Clean up after the test case
-        """
-        super(TestCase, self).tearDown()
-
     def test(self):
         """
         Test case implementation
         """
 
         # Get all LUNs fet back	om the Storage Array
-        luns_in_array = self.navi_get_luns()
+        luns_in_array = self.san_inventory.luns
 
         # Get all 'lun-disk' items from LITP model
-        client = LitpClient(host=self.mws['ip'],
-            password=self.litp_utils.get_litpadmin_password(self)
-        )
-        model = Model(client)
+        model = self.get_model()
         luns_in_model = model.luns
 
         # Verify the LUNs exist in the Storage Array
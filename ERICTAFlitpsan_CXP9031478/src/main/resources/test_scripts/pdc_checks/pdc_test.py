@@ -0,0 +1,43 @@
+from infra_utils.san_test import SanTest
+from ptaf.utils.litp_cmd_utils import LitpUtils
+from ptaf.utils.litp_utils.api_client import LitpClient
+from ptaf.utils.model_utils import ModelUtils
+from infra_utils.utils.enm_helpers import Model
+from san_inventory import SanInventory
+
+
+class PdcTest(SanTest):
+
+    """
+    A generic class with the set up shared by the
+    post deployment check test cases
+    """
+
+    def setUp(self):
+        """
+        Set up the test case
+        """
+        super(PdcTest, self).setUp()
+
+        self.litp_utils = LitpUtils()
+        self.model_utils = ModelUtils()
+        self.navi_target = self.mws
+        self.san_inventory = SanInventory(self)
+        self.litp_client = None
+        self.model = None
+
+    def tearDown(self):
+        """
+        Clean up after the test case
+        """
+        super(PdcTest, self).tearDown()
+
+    def get_model(self):
+        """
+        Returns the LITP model, connecting to LITP on first use only
+        """
+        if self.model is None:
+            self.litp_client = LitpClient(host=self.mws['ip'],
+                password=self.litp_utils.get_litpadmin_password(self))
+            self.model = Model(self.litp_client)
+        return self.model
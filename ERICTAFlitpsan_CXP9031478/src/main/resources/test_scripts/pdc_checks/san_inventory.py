@@ -0,0 +1,254 @@
+"""
+DESCRIPTION:
+Shared SAN inventory for the post deployment checks.
+
+A full naviseccli LUN dump takes tens of seconds on a large VNX, and every
+PDC script needs it. The first script to ask for the inventory captures the
+LUNs and storage groups and persists them on the MS; the scripts that run
+after it in the same suite read that capture back instead of querying the
+array again. A capture is only reused while it is younger than the TTL and
+its fingerprint matches the array the current script is pointed at.
+Scripts running in parallel take turns under a lock to capture, so only
+the first of them queries the array and the others read its capture.
+
+The capture is kept in a directory private to the user running the
+checks. A record is only loaded from a regular file owned by that user and
+writable by nobody else, so no other user can plant one for it to unpickle.
+"""
+
+import cPickle
+import errno
+import fcntl
+import hashlib
+import os
+import stat
+import tempfile
+import time
+
+STATE_DIR = os.environ.get('LITPSAN_PDC_STATE_DIR', os.path.join(
+        tempfile.gettempdir(), 'litpsan-pdc-%d' % os.getuid()))
+INVENTORY_FILE = os.path.join(STATE_DIR, 'san_inventory.pkl')
+INVENTORY_TTL = int(os.environ.get('LITPSAN_PDC_INVENTORY_TTL', 900))
+
+
+class SanInventory(object):
+
+    """
+    LUN and storage group information for the SAN, captured once per suite
+    run and shared between the PDC scripts through a file on the MS
+    """
+
+    def __init__(self, context, path=INVENTORY_FILE, ttl=INVENTORY_TTL):
+        """
+        context is the running SanTest, used both for logging and for the
+        naviseccli queries when no usable capture exists
+        """
+        self.context = context
+        self.path = path
+        self.ttl = ttl
+        self.fingerprint = self.get_fingerprint()
+        self._record = None
+
+    def get_fingerprint(self):
+        """
+        Identifies the array the inventory was captured from, so a capture
+        from a different SAN or naviseccli target is never reused
+        """
+        san = self.context.san or {}
+        navi_target = getattr(self.context, 'navi_target', None) or {}
+        digest = hashlib.sha1()
+        digest.update(repr(sorted(san.items())))
+        digest.update(str(navi_target.get('ip')))
+        return digest.hexdigest()
+
+    @property
+    def luns(self):
+        """
+        All LUNs on the SAN, as returned by navi_get_luns()
+        """
+        return self._get_record()['luns']
+
+    @property
+    def sgs(self):
+        """
+        All storage groups on the SAN, as returned by navi_get_sgs()
+        """
+        return self._get_record()['sgs']
+
+    def get_lun_ids_by_name(self):
+        """
+        Index of SAN LUN name to LUN ID
+        """
+        return dict((lun['Name'], lun_id)
+                    for lun_id, lun in self.luns.items())
+
+    def get_lun_sg_hlus(self):
+        """
+        Index of SAN LUN ID to the storage groups it is registered with,
+        as a dict of storage group name to HLU
+        """
+        lun_sg_hlus = {}
+        for sg in self.sgs:
+            sg_name = sg['Storage Group Name']
+            for lun_id, hlu in sg['HLU/ALU Pairs'].items():
+                lun_sg_hlus.setdefault(lun_id, {})[sg_name] = hlu
+        return lun_sg_hlus
+
+    def get_sgs_by_name(self):
+        """
+        Index of storage group name to storage group
+        """
+        return dict((sg['Storage Group Name'], sg) for sg in self.sgs)
+
+    def get_sg_wwns(self):
+        """
+        Index of storage group name to the set of WWNs registered with it.
+        Each 'HBA UID' is the WWNN and WWPN joined by a colon, both halves
+        are kept and upper-cased to match the WWNs in the LITP model.
+        A storage group with no hosts registered has an empty set.
+        """
+        sg_wwns = {}
+        for sg in self.sgs:
+            wwns = set()
+            for hba in sg.get('HBA UID', []):
+                wwn = hba[0]
+                wwns.add(str(wwn[:len(wwn) / 2]).upper())
+                wwns.add(str(wwn[(len(wwn) / 2) + 1:]).upper())
+            sg_wwns[sg['Storage Group Name']] = wwns
+        return sg_wwns
+
+    def invalidate(self):
+        """
+        Discard the persisted capture so the next reader queries the SAN
+        """
+        self._record = None
+        try:
+            os.remove(self.path)
+        except OSError as error:
+            if error.errno != errno.ENOENT:
+                raise
+
+    def _get_record(self):
+        if self._record is None:
+            record = self._read()
+            if record is None:
+                lock = lock_record(self.path)
+                try:
+                    # Another script may have captured while this one
+                    # waited for the lock
+                    record = self._read() or self._capture()
+                finally:
+                    os.close(lock)
+            self._record = record
+        return self._record
+
+    def _read(self):
+        """
+        Returns the persisted capture, or None if it is missing, unreadable,
+        expired or was taken from a different array
+        """
+        record = read_record(self.path)
+        if record is None:
+            return None
+        if record.get('fingerprint') != self.fingerprint:
+            self.context.info('Ignoring SAN inventory from a different array')
+            return None
+        age = time.time() - record.get('captured', 0)
+        if age > self.ttl:
+            self.context.info('Ignoring SAN inventory captured %ds ago', age)
+            return None
+
+        self.context.info('Using SAN inventory captured %ds ago', age)
+        return record
+
+    def _capture(self):
+        """
+        Queries the SAN and persists the result for the other PDC scripts
+        """
+        self.context.info('Capturing SAN inventory')
+        record = {
+            'fingerprint': self.fingerprint,
+            'captured': time.time(),
+            'luns': self.context.navi_get_luns(),
+            'sgs': self.context.navi_get_sgs(),
+        }
+        write_record(self.path, record)
+        return record
+
+
+def is_private(path, file_type):
+    """
+    Whether path, not followed if it is a link, is of file_type, owned by
+    the current user and not writable by group or others
+    """
+    try:
+        info = os.lstat(path)
+    except OSError:
+        return False
+    return (file_type(info.st_mode) and info.st_uid == os.getuid() and
+            not info.st_mode & (stat.S_IWGRP | stat.S_IWOTH))
+
+
+def make_state_dir(path):
+    """
+    Creates the directory for records, readable by its owner only, and
+    raises IOError if what is there is not private to the current user
+    """
+    try:
+        os.mkdir(path, 0700)
+    except OSError as error:
+        if error.errno != errno.EEXIST:
+            raise
+    if not is_private(path, stat.S_ISDIR) or \
+            stat.S_IMODE(os.lstat(path).st_mode) & 0077:
+        raise IOError("%s is not a directory private to uid %d" %
+                      (path, os.getuid()))
+
+
+def lock_record(path):
+    """
+    Takes the lock on the record at path, released when the returned
+    descriptor is closed
+    """
+    make_state_dir(os.path.dirname(path))
+    lock = os.open(path + '.lock', os.O_RDWR | os.O_CREAT | os.O_NOFOLLOW,
+                   0600)
+    fcntl.flock(lock, fcntl.LOCK_EX)
+    return lock
+
+
+def read_record(path):
+    """
+    Returns the record pickled at path, or None if it is missing,
+    unreadable or not private to the current user
+    """
+    if not (is_private(os.path.dirname(path), stat.S_ISDIR) and
+            is_private(path, stat.S_ISREG)):
+        return None
+    try:
+        with open(path, 'rb') as handle:
+            return cPickle.load(handle)
+    except Exception:
+        return None
+
+
+def write_record(path, record):
+    """
+    Pickles record to path, readable by its owner only. The record is
+    written to a new private file and renamed into place so a script
+    starting in parallel never reads a partial record.
+    """
+    make_state_dir(os.path.dirname(path))
+    tmp_path = '%s.%d' % (path, os.getpid())
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | os.O_NOFOLLOW
+    try:
+        fd = os.open(tmp_path, flags, 0600)
+    except OSError as error:
+        if error.errno != errno.EEXIST:
+            raise
+        # left behind by an earlier process with the same pid
+        os.remove(tmp_path)
+        fd = os.open(tmp_path, flags, 0600)
+    with os.fdopen(fd, 'wb') as handle:
+        cPickle.dump(record, handle, cPickle.HIGHEST_PROTOCOL)
+    os.rename(tmp_path, path)
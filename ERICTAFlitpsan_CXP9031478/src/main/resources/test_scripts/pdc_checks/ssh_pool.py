@@ -0,0 +1 @@
+../common/ssh_pool.py
\ No newline at end of file
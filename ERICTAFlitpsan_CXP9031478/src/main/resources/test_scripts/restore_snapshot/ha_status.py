@@ -0,0 +1 @@
+../common/ha_status.py
\ No newline at end of file
@@ -11,14 +11,14 @@ TORF-101579
 """
 
 from infra_utils.snap_test import SnapTest
-from ptaf.utils.litp_cmd_utils import LitpUtils
 from ptaf.utils.litp_utils.api_client import LitpClient
 from infra_utils.utils.enm_helpers import Model
 from infra_utils.restore_test import RestoreTest
+from plan_utils import PlanWaiterMixin
 from random import randint
 
 
-class TestCase(RestoreTest):
+class TestCase(PlanWaiterMixin, RestoreTest):
 
     """
     Test case to verify restore_snapshot fails when one snap has been removed.
@@ -61,7 +61,7 @@ class TestCase(RestoreTest):
         self._logger.info('Creating snapshot with litp')
         modelitem = self.litp_client.create_snapshot()
         self._logger.info('Waiting for plan to complete')
-        plan = self.litp_client.wait_plan_completion()
+        plan = self.wait_plan_completion()
 
         # 2.1 assert that litp plan succeeded
         self.assertEqual(plan.properties['state'], "successful")
@@ -77,14 +77,16 @@ class TestCase(RestoreTest):
         self._logger.info('Attempting restore snapshot')
         self.litp_client.restore_snapshot()
         self._logger.info('Waiting for plan to complete')
-        plan = self.litp_client.wait_plan_completion()
+        plan = self.wait_plan_completion()
 
         # 4.1.Assert that litp plan failed
         self.assertEqual(plan.properties['state'], "failed")
 
         # 4.2.Check that the task failed for Verify Snapshot Exists
         task_name = 'Verify snapshot exists for LUN {0}'.format(lun)
-        task_status = LitpUtils.get_litp_task_status(self, task_name)
+        task_status = self.plan_tasks.get_status(task_name)
+        self.assertIsNotNone(task_status,
+                             'Fail: No plan task matches "%s"' % task_name)
         self._logger.info('Task status is: {0}'.format(task_status.lower()))
         self.assertEqual(task_status.lower(), 'failed',
                          'Fail: Verify snapshot exists task did not Fail for any LUN')
@@ -9,13 +9,17 @@ AGILE:
 """
 
 from infra_utils.restore_test import RestoreTest
+from plan_utils import PlanWaiterMixin
+from snapshot_cleanup import SnapshotCleanupMixin
 from ptaf.utils.litp_cmd_utils import LitpUtils
 from ptaf.utils.litp_utils.api_client import LitpClient
 from infra_utils.utils.enm_helpers import Model
+from ha_status import HaStatusMixin
 import os
 
 
-class TestCase(RestoreTest):
+class TestCase(HaStatusMixin, PlanWaiterMixin, SnapshotCleanupMixin,
+               RestoreTest):
 
     """
     Test case to verify snapshots exist on SAN after upgrade
@@ -67,7 +71,7 @@ class TestCase(RestoreTest):
                 self.create_file(fs, self.file_name1, node)
         self.info("create litp snapshot")
         self.litp_client.create_snapshot()
-        self.litp_client.wait_plan_completion()
+        self.wait_plan_completion()
 
         self.info("remove file set 1")
         self.info("create file set 2")
@@ -81,7 +85,9 @@ class TestCase(RestoreTest):
 
         self.info("litp restore snapshot")
         self.litp_client.restore_snapshot()
-        plan = self.litp_client.wait_plan_completion()
+        plan = self.wait_plan_completion()
+        # The restore reboots the nodes
+        self.invalidate_ha_status()
         self.info("verify file set 1 is present")
         self.info("verify file set 2 is absent")
         for lun, fs_tuple in self.file_systems.items():
@@ -105,15 +111,19 @@ class TestCase(RestoreTest):
         snapshot = self.litp_client.get("/snapshots/snapshot")
         if snapshot is not None:
             self.litp_client.remove_snapshot()
-            self.litp_client.wait_plan_completion()
+            self.wait_plan_completion()
+        report = None
         if len(self.manual_snaps) > 0:
-            for snap in self.manual_snaps:
-                self.sanapi_delete_snapshot(snap[1])
+            report = self.delete_san_snapshots(
+                [snap[1] for snap in self.manual_snaps],
+                self.sanapi_delete_snapshot)
         for lun, fs_tuple in self.file_systems.items():
             node, fs_list = fs_tuple
             for fs in fs_list:
                 self.remove_file(fs, self.file_name1, node)
                 self.remove_file(fs, self.file_name2, node)
+        if report is not None:
+            self.assertTrue(report, str(report))
 
     def get_file_systems_dict(self, s_luns):
         """
@@ -0,0 +1 @@
+../common/plan_history.py
\ No newline at end of file
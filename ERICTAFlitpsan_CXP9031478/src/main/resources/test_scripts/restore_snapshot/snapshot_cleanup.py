@@ -0,0 +1 @@
+../common/snapshot_cleanup.py
\ No newline at end of file
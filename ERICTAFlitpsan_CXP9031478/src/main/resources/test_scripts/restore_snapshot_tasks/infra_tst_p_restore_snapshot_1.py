@@ -8,9 +8,9 @@ AGILE:
 TORF-96620
 """
 
-from infra_utils.restore_test import RestoreTest
+from restore_tasks_test import NodeCommandBatch, RestoreTasksTest
 
-class TestCase(RestoreTest):
+class TestCase(RestoreTasksTest):
 
     """
     Test case to verify the create_snapshot functionality in the plugin
@@ -33,44 +33,9 @@ class TestCase(RestoreTest):
         self.service_online = {}
 
         # 1: Determine which file systems to place files on
-        # Iterate through each node
-        for node_id, node in self.model.nodes.items():
-            print "> NODE %s, hostname %s, ip %s" % (node_id,
-                    node.properties['hostname'], node.ip)
-            snappable_luns = self.get_snappable_luns(node)
-            # Iterate through each LUN &
-            # Use only snap size > 0, external snap == false
-            for lun_name, lun in snappable_luns.items():
-                # get file systems
-                fs = self.get_file_systems(node_id, lun_name)
-                print "      LUN: %s  FS: %s" % (lun_name, ', '.join(fs))
-                if not fs:
-                    print "no file systems to create files on"
-                    continue
-                for item in fs:
-                    if item == "/":
-                        file_path1 = item + self.pre_tasks_file
-                    else:
-                        file_path1 = item + '/' + self.pre_tasks_file
-                    # 2: Place files on each node in the model
-                    command = "touch %s" % ''.join(file_path1)
-                    errorMsg = "Problem touching file: %s on LUN: %s" \
-                    % (file_path1, lun_name)
-                    print "Node: " + node_id
-                    print "checking LUN shared"
-                    if lun.properties['shared'] == 'true':
-                        # shared luns only run touch command
-                        # if service is online
-                        print "lun %s is shared" % lun_name
-                        service_is_online = self.verify_online_services(item,\
-                             node)
-                        if service_is_online:
-                            self.run_server_command(command, errorMsg, \
-                            file_path1, node, lun_name, log_path=True)
-                    else:
-                        # non shared luns always run touch command
-                        self.run_server_command(command, errorMsg, \
-                            file_path1, node, lun_name, log_path=True)
+        # Iterate through each node, several nodes at a time
+        self.for_each_node()
+
         exitCode = 0
         if self.resultStr1:
             print "Unable to create file(s) in: " + self.resultStr1
@@ -82,5 +47,49 @@ class TestCase(RestoreTest):
                 exitCode = 1
         self.assertEquals(exitCode, 0)
 
+    def stage_node(self, node_id, node):
+        """
+        Place file set A on the file systems of one node
+        """
+        print "> NODE %s, hostname %s, ip %s" % (node_id,
+                node.properties['hostname'], node.ip)
+        snappable_luns = self.get_snappable_luns(node)
+        # Every file operation on the node runs in one remote script
+        batch = NodeCommandBatch()
+        # Iterate through each LUN &
+        # Use only snap size > 0, external snap == false
+        for lun_name, lun in snappable_luns.items():
+            # get file systems
+            fs = self.get_file_systems(node_id, lun_name)
+            print "      LUN: %s  FS: %s" % (lun_name, ', '.join(fs))
+            if not fs:
+                print "no file systems to create files on"
+                continue
+            for item in fs:
+                if item == "/":
+                    file_path1 = item + self.pre_tasks_file
+                else:
+                    file_path1 = item + '/' + self.pre_tasks_file
+                # 2: Place files on each node in the model
+                command = "touch %s" % ''.join(file_path1)
+                errorMsg = "Problem touching file: %s on LUN: %s" \
+                % (file_path1, lun_name)
+                print "Node: " + node_id
+                print "checking LUN shared"
+                if lun.properties['shared'] == 'true':
+                    # shared luns only run touch command
+                    # if service is online
+                    print "lun %s is shared" % lun_name
+                    service_is_online = self.verify_online_services(item,\
+                         node)
+                    if service_is_online:
+                        batch.add(command, errorMsg, \
+                        file_path1, lun_name, log_path=True)
+                else:
+                    # non shared luns always run touch command
+                    batch.add(command, errorMsg, \
+                        file_path1, lun_name, log_path=True)
+        self.run_node_batch(batch, node)
+
 if __name__ == '__main__':
     TestCase().run_test()
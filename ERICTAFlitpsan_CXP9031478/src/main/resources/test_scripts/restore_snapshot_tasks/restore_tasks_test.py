@@ -0,0 +1,222 @@
+import copy
+import re
+import sys
+import threading
+
+from infra_utils.restore_test import RestoreTest
+from ha_status import HaStatusMixin
+from parallel import DEFAULT_WORKERS, run_parallel
+from ssh_pool import PooledCMDUtils
+
+# Marks the exit code lines in the output of a node command batch
+RC_MARKER = '__rc__'
+
+
+class RestoreTasksTest(HaStatusMixin, RestoreTest):
+
+    """
+    A generic class with some functionality
+    for writing restore snapshot task test cases
+    """
+
+    # Maximum number of nodes worked on at the same time
+    node_workers = DEFAULT_WORKERS
+
+    def setUp(self):
+        """
+        SetUp the test case.
+        Every command run on the MS and the peer nodes through
+        run_server_command shares pooled SSH connections.
+        """
+        super(RestoreTasksTest, self).setUp()
+        self.cmd_utils = PooledCMDUtils()
+        self.resultStr1 = ""
+        self.resultStr2 = ""
+        self.service_online = {}
+
+    def tearDown(self):
+        """
+        Report how the SSH connections and the service states were
+        reused and close the connections
+        """
+        self.info(self.ha_status.summary())
+        self.info(self.cmd_utils.ssh_pool.summary())
+        self.cmd_utils.ssh_pool.close_all()
+        super(RestoreTasksTest, self).tearDown()
+
+    def for_each_node(self):
+        """
+        Runs stage_node(node_id, node), which the test case must define,
+        for every node in the model, on up to node_workers nodes at a time.
+        Each node works on its own copy of the test case so the results
+        recorded by run_server_command and verify_online_services are
+        merged back here in node order, and the output of each node is
+        printed as one block, also in node order.
+        Each copy has its own SSH connections, and calls to the LITP
+        client shared by the copies are made one at a time.
+        """
+        if not callable(getattr(self, 'stage_node', None)):
+            raise TypeError("%s must define stage_node(node_id, node) to "
+                            "use for_each_node" % type(self).__name__)
+
+        litp_client = getattr(self, 'litp_client', None)
+        if litp_client is not None:
+            litp_client = SerialClient(litp_client)
+        node_pools = []
+
+        def run_node(node_item):
+            node_id, node = node_item
+            node_test = copy.copy(self)
+            node_test.cmd_utils = PooledCMDUtils()
+            node_pools.append(node_test.cmd_utils.ssh_pool)
+            if litp_client is not None:
+                node_test.litp_client = litp_client
+            node_test.resultStr1 = ""
+            node_test.resultStr2 = ""
+            node_test.service_online = {}
+            try:
+                node_test.stage_node(node_id, node)
+            finally:
+                node_test.cmd_utils.ssh_pool.close_all()
+            return node_test
+
+        results = run_parallel(sorted(self.model.nodes.items()), run_node,
+                               self.node_workers, capture_output=True)
+        pool = self.cmd_utils.ssh_pool
+        for node_pool in node_pools:
+            pool.opened += node_pool.opened
+            pool.reused += node_pool.reused
+            pool.handshake_time += node_pool.handshake_time
+        for result in results:
+            sys.stdout.write(result.output)
+            if not result.ok:
+                print "Problem on node %s:\n%s" % (result.item[0],
+                                                  result.traceback)
+                continue
+            node_test = result.value
+            self.resultStr1 += node_test.resultStr1
+            self.resultStr2 += node_test.resultStr2
+            # A service only needs to be online on one of its nodes
+            for svc, online in node_test.service_online.items():
+                self.service_online[svc] = max(online,
+                        self.service_online.get(svc, online))
+
+        for result in results:
+            if not result.ok:
+                raise result.error
+
+    def run_node_batch(self, batch, node):
+        """
+        Runs every command in the batch on the node in one remote script,
+        over a single proxied session as root, and records each command's
+        outcome the way run_server_command does. Returns a list of
+        (command, exit code) pairs, in the order the commands were added.
+        """
+        if not batch.commands:
+            return []
+        result = self.run_node_command(batch.compile(), node)
+        retcodes = batch.parse(result.stdout)
+
+        outcomes = []
+        for index, command in enumerate(batch.commands):
+            # A command with no exit code never ran, treat it as failed
+            retcode = retcodes.get(index, 1)
+            self.record_result(command, retcode, node)
+            outcomes.append((command, retcode))
+        return outcomes
+
+    def record_result(self, command, retcode, node):
+        """
+        log_path True logs the file path to resultStr1 if the command
+        failed, log_path False logs it to resultStr2 if the command
+        succeeded, and log_path None does not log it
+        """
+        if command.log_path is None:
+            return
+        if command.log_path and retcode != 0:
+            print command.error_msg
+            self.resultStr1 += "\n    %s (LUN: %s, node: %s)" % (
+                    command.file_path, command.lun_name, node.id)
+        elif not command.log_path and retcode == 0:
+            print command.error_msg
+            self.resultStr2 += "\n    %s (LUN: %s, node: %s)" % (
+                    command.file_path, command.lun_name, node.id)
+
+
+class SerialClient(object):
+
+    """
+    Wraps a client object so that calls to its methods from several
+    threads are made one at a time
+    """
+
+    def __init__(self, client):
+        self._client = client
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            with self._lock:
+                return attr(*args, **kwargs)
+        return call
+
+
+class BatchCommand(object):
+
+    """
+    One command of a node command batch, with the arguments
+    run_server_command would have been given for it
+    """
+
+    def __init__(self, command, error_msg, file_path, lun_name, log_path):
+        self.command = command
+        self.error_msg = error_msg
+        self.file_path = file_path
+        self.lun_name = lun_name
+        self.log_path = log_path
+
+    def __str__(self):
+        return self.command
+
+    def __repr__(self):
+        return self.__str__()
+
+
+class NodeCommandBatch(object):
+
+    """
+    File operations for one node, compiled into a single remote script
+    which reports the exit code of each operation
+    """
+
+    def __init__(self):
+        self.commands = []
+
+    def add(self, command, error_msg, file_path, lun_name, log_path=None):
+        """
+        Queue a command, taking the same arguments as run_server_command
+        apart from the node
+        """
+        self.commands.append(BatchCommand(command, error_msg, file_path,
+                                          lun_name, log_path))
+
+    def compile(self):
+        """
+        The script to run on the node. Every command runs even if an
+        earlier one fails, and is followed by a line with its exit code.
+        """
+        return '; '.join('%s >/dev/null 2>&1; echo "%s %d $?"' % (
+                command.command, RC_MARKER, index)
+                for index, command in enumerate(self.commands))
+
+    def parse(self, stdout):
+        """
+        Returns a dict of command index to exit code from the script output
+        """
+        pattern = re.compile(r'^%s (\d+) (\d+)\s*$' % RC_MARKER, re.M)
+        return dict((int(index), int(retcode))
+                    for index, retcode in pattern.findall(stdout))
@@ -8,9 +8,11 @@ AGILE:
 OSS-78423
 """
 from infra_utils.snap_test import SnapTest
-from ptaf.utils.litp_cmd_utils import LitpUtils
+from plan_utils import PlanWaiterMixin
+from snapshot_index import SnapshotMatcher
+from snapshot_cleanup import SnapshotCleanupMixin
 
-class TestCase(SnapTest):
+class TestCase(PlanWaiterMixin, SnapshotCleanupMixin, SnapTest):
     """
     Test case to verify the create_snapshot functionality in the plugin
     http://taftm.lmera.ericsson.se/#tm/viewTC/infra_tst_n_create_snapshot_snap_exists_on_san
@@ -39,11 +41,9 @@ class TestCase(SnapTest):
     
     
     def filter_snapshot(self, snaps):
-        filtered = []
-        for snap in snaps:
-            if snap['Name'].split("_")[-1] == self.snap:
-                filtered.append(snap)
-        return filtered
+        matcher = SnapshotMatcher.for_model(self.get_model_snapshots(),
+                                            self.snap)
+        return matcher.filter(snaps)
 
     def cleanup_plan(self, plan):
         """
@@ -79,15 +79,15 @@ class TestCase(SnapTest):
             if self.snap in names:
                 print "removing snapshot through LITP"
                 self.litp_client.remove_snapshot(self.snap)
-                self.litp_client.wait_plan_completion()
+                self.wait_plan_completion()
 
         # Remove the snaps on the LUNS on the SAN
         all_snaps  = self.navi_get_snapshots()
         filtered_snaps = self.filter_snapshot(all_snaps)
-        for snap in filtered_snaps:
-            if snap:
-                print "removing snapshot with navisec"
-                self.navi_delete_snapshot(self.snap)
+        print "removing %d snapshots with navisec" % len(filtered_snaps)
+        report = self.delete_san_snapshots(
+            [snap['Name'] for snap in filtered_snaps])
+        self.assertTrue(report, str(report))
         
     def tearDown(self):
         """
@@ -125,13 +125,15 @@ class TestCase(SnapTest):
 
         # check that litp plan failed
         self._logger.info('Waiting for plan to complete')
-        plan = self.litp_client.wait_plan_completion()
+        plan = self.wait_plan_completion()
 
         self.assertEqual(plan.properties['state'], "failed")
 
         # check that the san plugin task to check for existing snaps failed
         task_name = "Checking for existing snapshots"
-        task_status = LitpUtils.get_litp_task_status(self, task_name)
+        task_status = self.plan_tasks.get_status(task_name)
+        self.assertIsNotNone(task_status,
+                             'Fail: No plan task matches "%s"' % task_name)
         self.assertEqual(task_status.lower(), 'failed',
                          'Fail: Check for existing snapshots failed')
 
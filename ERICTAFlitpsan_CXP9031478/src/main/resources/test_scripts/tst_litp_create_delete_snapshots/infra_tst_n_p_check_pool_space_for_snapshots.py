@@ -8,13 +8,20 @@ Verify that the thin LUN space calculation works and snapshot is created success
 AGILE:
 OSS-78423, TORF-101584
 """
-from ptaf.utils.litp_cmd_utils import LitpUtils
 from infra_utils.snap_test import SnapTest
+from plan_utils import PlanWaiterMixin
 from ptaf.utils.litp_utils.api_client import LitpException
-from time import sleep
+from pool_capacity import SnapshotSpaceCalculator, is_snappable
+from waiting import wait_until
+import os
 
+# Seconds to wait for the pool capacity to show a new LUN, and for the
+# test LUN to be removed
+POOL_UPDATE_TIMEOUT = int(os.environ.get('LITPSAN_POOL_UPDATE_TIMEOUT', 300))
+LUN_REMOVAL_TIMEOUT = int(os.environ.get('LITPSAN_LUN_REMOVAL_TIMEOUT', 1800))
 
-class TestCase(SnapTest):
+
+class TestCase(PlanWaiterMixin, SnapTest):
     """
     Test case to verify the create_snapshot functionality in the plugin
     http://taftm.lmera.ericsson.se/#tm/viewTC/infra_tst_n_p_check_pool_space_for_snapshots
@@ -83,19 +90,18 @@ class TestCase(SnapTest):
         self._logger.info('Cleaning down test LUN {0}'.format(self.test_lun_name_l))
         self.navi_destroy_snaps_and_lun(self.test_lun_name_l)
         # The LUN can take a long time to delete, polling this
-        while True:
-            self._logger.info('Waiting for lun {0} to be removed'.format(self.test_lun_name_l))
-            res = self.navi_get_lun(self.test_lun_name_l)
-            if not res:
-                break
-            sleep(5)
+        self._logger.info('Waiting for lun {0} to be removed'.format(self.test_lun_name_l))
+        wait_until(lambda: not self.navi_get_lun(self.test_lun_name_l),
+                   LUN_REMOVAL_TIMEOUT, interval=5, max_interval=60,
+                   description='Removal of LUN %s' % self.test_lun_name_l,
+                   logger=self._logger)
 
         # Remove Litp snapshot
         try :
             self._logger.info('Cleaning down any snap shots that might have been created')
             self.litp_client.remove_snapshot('snapshot')
             self._logger.info('Waiting for plan to complete')
-            self.litp_client.wait_plan_completion()
+            self.wait_plan_completion()
         except LitpException:
             self._logger.info("No Snap Shot To remove")
 
@@ -111,22 +117,49 @@ class TestCase(SnapTest):
                                    ignore_thresholds=True)
         self.assertEqual(cmd.retcode, 0,
                         'Fail: create test LUN failed')
+        return lun_size
+
+    def get_pool_free_capacity(self, pool_name):
+        pool_information = self.navi_get_pool(pool_name)
+        return float(pool_information['Available Capacity (GBs)'])
 
-    def get_thin_lun_snap_size(self, luns_in_model):
-        self._logger.info('Calculating total size of thin LUN snapshots')
-        total_snap_size = 0
+    def wait_for_pool_update(self, pool_name, free_capacity, lun_size):
+        """
+        Wait until the available capacity of the pool shows a new LUN of
+        lun_size GB, allowing for the rounding of the reported capacity
+        """
+        expected = free_capacity - lun_size * 0.9
+        return wait_until(
+            lambda: self.get_pool_free_capacity(pool_name) <= expected,
+            POOL_UPDATE_TIMEOUT, interval=2, max_interval=30,
+            description='Pool %s capacity update' % pool_name,
+            logger=self._logger)
+
+    def wait_for_pool_recovery(self, pool_name, free_capacity, lun_size):
+        """
+        Wait until the available capacity of the pool is back to about
+        free_capacity once a LUN of lun_size GB has been removed from it
+        """
+        expected = free_capacity - lun_size * 0.1
+        return wait_until(
+            lambda: self.get_pool_free_capacity(pool_name) >= expected,
+            POOL_UPDATE_TIMEOUT, interval=2, max_interval=30,
+            description='Pool %s capacity recovery' % pool_name,
+            logger=self._logger)
+
+    def get_thin_lun_snap_size(self, luns_in_model, pool_name):
+        self._logger.info('Calculating size of thin LUN snapshots in pool '
+                          '{0}'.format(pool_name))
+        # The consumed capacity of every LUN comes from one LUN listing
+        calculator = SnapshotSpaceCalculator.from_san(self)
         for lun in luns_in_model.values():
-            if (lun.properties['external_snap'] == 'false' and
-                lun.properties['snap_size'] != '0'):
-                    snap_size=int(lun.properties['snap_size'])
-                    lun_information = self.navi_get_lun(lun.properties['lun_name'])
-                    lun_size=float(lun_information['Consumed Capacity (GBs)'])
-                    self._logger.info('LUN name: {0}'.format(lun.properties['lun_name']))
-                    self._logger.info('LUN size: {0}'.format(lun_size))
-                    lun_snap_size=(lun_size*snap_size)/100
-                    self._logger.info('LUN snap size: {0}'.format(lun_snap_size))
-                    total_snap_size+=lun_snap_size
-        return total_snap_size
+            if is_snappable(lun):
+                self._logger.info('LUN: {0}, snap size: {1}'.format(
+                    calculator.luns[lun.properties['lun_name']],
+                    calculator.get_lun_reserve(lun)))
+        # Only the snapshots of LUNs in pool_name take its free capacity
+        return calculator.get_pool_reserves(
+            luns_in_model.values()).get(pool_name, 0.0)
 
     def test(self):
         """
@@ -153,8 +186,7 @@ class TestCase(SnapTest):
         # 2.Find how much unused storage memory is available in the storage pool to which the LUN belongs
         lun_information = self.navi_get_lun(self.snapable_luns[0])
         pool_name = lun_information['Pool Name']
-        pool_information = self.navi_get_pool(pool_name)
-        pool_free_capacity = float(pool_information['Available Capacity (GBs)'])
+        pool_free_capacity = self.get_pool_free_capacity(pool_name)
         self._logger.info('pool capacity = {0}'.format(pool_free_capacity))
 
         # 3.Find if thin or thick LUN
@@ -164,16 +196,16 @@ class TestCase(SnapTest):
             ThinLun = True
 
         # 4. Create a large test LUN to use remaining capacity in the pool
-        self.create_thick_lun(pool_free_capacity, pool_name)
+        lun_size = self.create_thick_lun(pool_free_capacity, pool_name)
 
-        # Pause to allow available pool space to update
-        sleep(15)
+        # Wait for the available pool space to update
+        self.wait_for_pool_update(pool_name, pool_free_capacity, lun_size)
 
         # 5.Run Litp command 'litp create_snapshot', to create an upgrade snapshot
         modelitem = self.litp_client.create_snapshot()
 
         self._logger.info('Waiting for plan to complete')
-        plan = self.litp_client.wait_plan_completion()
+        plan = self.wait_plan_completion()
 
         # 5.1 assert that litp plan failed
         self.assertEqual(plan.properties['state'], "failed")
@@ -185,7 +217,9 @@ class TestCase(SnapTest):
             task_name = "Checking Pool Snapshot Reserve"
         print "TASK NAME = ", task_name
 
-        task_status = LitpUtils.get_litp_task_status(self, task_name)
+        task_status = self.plan_tasks.get_status(task_name)
+        self.assertIsNotNone(task_status,
+                             'Fail: No plan task matches "%s"' % task_name)
         self._logger.info('Task status is: {0}'.format(task_status.lower()))
         self.assertEqual(task_status.lower(), 'failed',
                          'Fail: Check Pool Snapshot reserve task did not Fail')
@@ -204,22 +238,29 @@ class TestCase(SnapTest):
             self.remove_snapshot_and_test_luns()
             self._logger.info('Thin LUN deployment detected')
 
+            # Wait for the space of the removed LUN to show in the pool
+            self.wait_for_pool_recovery(pool_name, pool_free_capacity,
+                                        lun_size)
+
             # 7.Find the total snap size usage by the LUNs on the SAN
-            total_snap_size = self.get_thin_lun_snap_size(luns_in_model)
+            total_snap_size = self.get_thin_lun_snap_size(luns_in_model,
+                                                          pool_name)
             self._logger.info('Space needed on the storage pool to create snapshot = {0}'
                               .format(total_snap_size))
+            pool_free_capacity = self.get_pool_free_capacity(pool_name)
+            self._logger.info('pool capacity = {0}'.format(pool_free_capacity))
             space_for_thick_lun = pool_free_capacity - total_snap_size
 
             # 8.Create thick LUN taking up most of the remaining space leaving just enough space for snapshot of the thin LUN deployment
-            self.create_thick_lun(space_for_thick_lun, pool_name)
+            lun_size = self.create_thick_lun(space_for_thick_lun, pool_name)
 
-            # Pause to allow available pool space to update
-            sleep(15)
+            # Wait for the available pool space to update
+            self.wait_for_pool_update(pool_name, pool_free_capacity, lun_size)
 
             # 9.Run Litp command 'litp create_snapshot', to create an upgrade snapshot
             modelitem = self.litp_client.create_snapshot()
             self._logger.info('Waiting for plan to complete')
-            plan = self.litp_client.wait_plan_completion()
+            plan = self.wait_plan_completion()
 
             # 9.1 assert that litp plan succeeded
             self.assertEqual(plan.properties['state'], "successful")
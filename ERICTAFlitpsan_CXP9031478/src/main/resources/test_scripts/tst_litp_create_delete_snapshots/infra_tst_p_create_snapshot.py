@@ -12,8 +12,11 @@ from ptaf.utils.litp_cmd_utils import LitpUtils
 from ptaf.utils.litp_utils.api_client import LitpClient
 from ptaf.utils import test_constants
 from infra_utils.snap_test import SnapTest
+from plan_utils import PlanWaiterMixin
+from snapshot_index import SnapshotCheckMixin, SnapshotMatcher
+from snapshot_cleanup import SnapshotCleanupMixin
 
-class TestCase(SnapTest):
+class TestCase(PlanWaiterMixin, SnapshotCheckMixin, SnapshotCleanupMixin, SnapTest):
 
     """
     Test case to verify the create_snapshot functionality in the plugin
@@ -29,11 +32,9 @@ class TestCase(SnapTest):
                      2.1 Verify that a snapshot exists on the VNX for each snapable lun-disk
     """
     def filter_snapshot(self, snaps):
-        filtered = []
-        for snap in snaps:
-            if snap['Name'].split("_")[-1] == self.snap:
-                filtered.append(snap)
-        return filtered
+        matcher = SnapshotMatcher.for_model(self.get_model_snapshots(),
+                                            self.snap)
+        return matcher.filter(snaps)
 
     def cleanup_plan(self, plan):
         """
@@ -68,16 +69,16 @@ class TestCase(SnapTest):
             if self.snap in names:
                 print "removing snapshot through LITP"
                 self.litp_client.remove_snapshot(self.snap)
-                self.litp_client.wait_plan_completion()
+                self.wait_plan_completion()
 
         # Remove the snaps on the LUNS on the SAN
         all_snaps  = self.navi_get_snapshots()
         filtered_snaps = self.filter_snapshot(all_snaps)
-        for snap in filtered_snaps:
-            if snap:
-                print "removing snapshot with navisec"
-                self.navi_delete_snapshot(self.snap)
+        print "removing %d snapshots with navisec" % len(filtered_snaps)
+        report = self.delete_san_snapshots(
+            [snap['Name'] for snap in filtered_snaps])
         super(TestCase, self).tearDown()
+        self.assertTrue(report, str(report))
 
     def test(self):
         """
@@ -95,7 +96,7 @@ class TestCase(SnapTest):
         self.litp_client.create_snapshot(self.snap)
         
         # 2.1: Wait for plan to complete
-        plan = self.litp_client.wait_plan_completion()
+        plan = self.wait_plan_completion()
         if plan.properties['state'] != 'successful':
             raise Exception("Snapshot creation failed \n plan output: %s" % \
                     str(plan.properties))
@@ -109,7 +110,8 @@ class TestCase(SnapTest):
         #2.1 Verify that a snapshot exists on the VNX for each snapable lun-disk
         self.info('Verifying a snap exists for each lun to be snapped by SAN')
         self.assertTrue(self.verify_snapshot_creation(navi_snaps,
-                                                      luns_to_be_snapped))
+                                                      luns_to_be_snapped,
+                                                      self.snap))
         
 
 if __name__ == '__main__':
@@ -1,9 +1,12 @@
 #!/usr/bin/env python
 
 from infra_utils.snap_test import SnapTest
+from plan_utils import PlanWaiterMixin
+from snapshot_index import SnapshotCheckMixin, SnapshotMatcher
+from snapshot_cleanup import SnapshotCleanupMixin
 import time
 
-class TestCase(SnapTest):
+class TestCase(PlanWaiterMixin, SnapshotCheckMixin, SnapshotCleanupMixin, SnapTest):
     """
     Test Case:
     1) Creates a snapshot through LITP
@@ -23,7 +26,7 @@ class TestCase(SnapTest):
             
         print "creating snapshot"
         self.litp_client.create_snapshot(self.snap)
-        plan = self.litp_client.wait_plan_completion()
+        plan = self.wait_plan_completion()
         if plan.properties['state'] != 'successful':
             raise Exception("Snapshot creation failed \n plan output: %s" % \
                     str(plan.properties))
@@ -34,7 +37,7 @@ class TestCase(SnapTest):
         san_snaps = self.navi_get_snapshots()
         model_snaps = self.get_model_snapshots()
         self.assertTrue(self.verify_snapshot_creation(
-            san_snaps, model_snaps))
+            san_snaps, model_snaps, self.snap))
         
         # Remove the snaps on the LUNS on the SAN
         all_snaps  = self.navi_get_snapshots()
@@ -46,7 +49,7 @@ class TestCase(SnapTest):
 
         print "removing snapshot with litp"
         self.litp_client.remove_snapshot(self.snap)
-        plan = self.litp_client.wait_plan_completion()
+        plan = self.wait_plan_completion()
         self.assertEqual(plan.properties['state'], 'successful')
         
         # check that the snapshot was removed from the model
@@ -54,15 +57,7 @@ class TestCase(SnapTest):
         self.assertFalse(snap)
 
     def filter_snapshot(self, navi_snaps, model_snaps):
-        model_names = [m_snp.properties["lun_name"] for m_snp in model_snaps]
-        snaps = []
-        for navi_snap in navi_snaps:
-            navi_name = navi_snap["Name"]
-            for name in model_names:
-                snap_name = "L_" + name + "_"
-                if snap_name in navi_name:
-                    snaps.append(navi_snap)
-        return snaps
+        return SnapshotMatcher.for_model(model_snaps).filter(navi_snaps)
 
     def cleanup_plan(self, plan):
         """
@@ -94,7 +89,7 @@ class TestCase(SnapTest):
         if snaps:
                 print "removing snapshot with litp"
                 self.litp_client.remove_snapshot(self.snap)
-                plan = self.litp_client.wait_plan_completion()
+                plan = self.wait_plan_completion()
                 self.assertEqual(plan.properties['state'], 'successful')
 
  
@@ -103,10 +98,10 @@ class TestCase(SnapTest):
         all_snaps  = self.navi_get_snapshots()
         model_snaps = self.get_model_snapshots()
         filtered_snaps = self.filter_snapshot(all_snaps, model_snaps)
-        for snap in filtered_snaps:
-            if snap:
-                print "removing snapshot with navisec"
-                self.navi_delete_snapshot(self.snap)
+        print "removing %d snapshots with navisec" % len(filtered_snaps)
+        report = self.delete_san_snapshots(
+            [snap['Name'] for snap in filtered_snaps])
+        self.assertTrue(report, str(report))
 
 if __name__ == '__main__':
     TestCase().run_test()
@@ -1,9 +1,12 @@
 #!/usr/bin/env python
 
 from infra_utils.snap_test import SnapTest
+from plan_utils import PlanWaiterMixin
+from snapshot_index import SnapshotCheckMixin, SnapshotMatcher
+from snapshot_cleanup import SnapshotCleanupMixin
 
 
-class TestCase(SnapTest):
+class TestCase(PlanWaiterMixin, SnapshotCheckMixin, SnapshotCleanupMixin, SnapTest):
     """
     Test Case:
     1) Creates a snapshot through LITP
@@ -30,7 +33,7 @@ class TestCase(SnapTest):
 
         print "creating snapshot"
         self.litp_client.create_snapshot(self.snap)
-        plan = self.litp_client.wait_plan_completion()
+        plan = self.wait_plan_completion()
         if plan.properties['state'] != 'successful':
             raise Exception("Snapshot creation failed \n plan output: %s" % \
                     str(plan.properties))
@@ -41,11 +44,11 @@ class TestCase(SnapTest):
         san_snap = self.navi_get_snapshots()
         model_snap = self.get_model_snapshots()
         self.assertTrue(self.verify_snapshot_creation(
-            san_snap, model_snap))
+            san_snap, model_snap, self.snap))
 
         print "removing snapshot through LITP"
         self.litp_client.remove_snapshot(self.snap)
-        plan = self.litp_client.wait_plan_completion()
+        plan = self.wait_plan_completion()
         self.assertEqual(plan.properties['state'], 'successful')
 
         # check that the snapshot was removed from the model
@@ -58,11 +61,9 @@ class TestCase(SnapTest):
             san_snap, model_snap))
 
     def filter_snapshot(self, snaps):
-        filtered = []
-        for snap in snaps:
-            if snap['Name'].split("_")[-1] == self.snap:
-                filtered.append(snap)
-        return filtered
+        matcher = SnapshotMatcher.for_model(self.get_model_snapshots(),
+                                            self.snap)
+        return matcher.filter(snaps)
 
     def cleanup_plan(self, plan):
         """
@@ -98,15 +99,15 @@ class TestCase(SnapTest):
             if self.snap in names:
                 print "removing snapshot through LITP"
                 self.litp_client.remove_snapshot(self.snap)
-                self.litp_client.wait_plan_completion()
+                self.wait_plan_completion()
 
         # Remove the snaps on the LUNS on the SAN
         all_snaps  = self.navi_get_snapshots()
         filtered_snaps = self.filter_snapshot(all_snaps)
-        for snap in filtered_snaps:
-            if snap:
-                print "removing snapshot with navisec"
-                self.navi_delete_snapshot(snap['Name'])
+        print "removing %d snapshots with navisec" % len(filtered_snaps)
+        report = self.delete_san_snapshots(
+            [snap['Name'] for snap in filtered_snaps])
+        self.assertTrue(report, str(report))
 
 
 if __name__ == '__main__':
@@ -15,6 +15,9 @@ TORF-101576
 
 
 from infra_utils.snap_test import SnapTest
+from plan_utils import PlanWaiterMixin
+from snapshot_index import SnapshotCheckMixin, SnapshotMatcher
+from snapshot_cleanup import SnapshotCleanupMixin
 import time
 
 class Object(object):
@@ -37,13 +40,16 @@ class ListOfSnaps(object):
         self.snaps = {}
         self.add_snaps(navi_list)
     def add_snaps(self, list_of_navi_snaps ):
+        lun_ids = None
         for navi_snap in list_of_navi_snaps:
             if type(navi_snap)==type({}):
                 snap = Snap(name=navi_snap['Name'], id=navi_snap['Source LUN(s)'])
             else:
+                # LUN ids come from one listing shared by the test case
+                if lun_ids is None:
+                    lun_ids = self.context.get_lun_ids()
                 lun_name = navi_snap.properties['lun_name']
-                lun = self.context.sanapi_get_lun_by_name(lun_name)
-                snap = Snap(name=lun_name, id=lun[lun_name]['lun id'])
+                snap = Snap(name=lun_name, id=lun_ids[lun_name])
             self.snaps[snap.key()]=snap
     def __str__(self):
         return repr(self.snaps)
@@ -55,7 +61,7 @@ class ListOfSnaps(object):
         return snap.key() in self.snaps
 
 
-class TestCase(SnapTest):
+class TestCase(PlanWaiterMixin, SnapshotCheckMixin, SnapshotCleanupMixin, SnapTest):
     """
     Test case to verify the restore snapshot if maunal snaps are present
     Test Case:
@@ -108,7 +114,7 @@ class TestCase(SnapTest):
 
         self._logger.info("creating snapshots through LITP")
         self.litp_client.create_snapshot(self.snap)
-        plan = self.litp_client.wait_plan_completion()
+        plan = self.wait_plan_completion()
         if plan.properties['state'] != 'successful':
             raise Exception("Snapshot creation failed \n plan output: %s" % \
                     str(plan.properties))
@@ -121,7 +127,7 @@ class TestCase(SnapTest):
 
         obj_model_snaps = ListOfSnaps(self, model_snaps)
         self.assertTrue(self.verify_snapshot_creation(
-            san_snaps, model_snaps))
+            san_snaps, model_snaps, self.snap))
 
         # Create manual snapshots and keep record of wich have been added
         for model_snap in obj_model_snaps:
@@ -135,7 +141,7 @@ class TestCase(SnapTest):
         # Remove the snaps using LITP
         self._logger.info("removing snapshot with litp")
         self.litp_client.remove_snapshot(self.snap)
-        plan = self.litp_client.wait_plan_completion()
+        plan = self.wait_plan_completion()
         self.assertEqual(plan.properties['state'], 'successful')
 
         # check that the snapshot was removed from the model
@@ -158,15 +164,7 @@ class TestCase(SnapTest):
 
 
     def filter_snapshot(self, navi_snaps, model_snaps):
-        model_names = [m_snp.properties["lun_name"] for m_snp in model_snaps]
-        snaps = []
-        for navi_snap in navi_snaps:
-            navi_name = navi_snap["Name"]
-            for name in model_names:
-                snap_name = "L_" + name + "_"
-                if snap_name in navi_name:
-                    snaps.append(navi_snap)
-        return snaps
+        return SnapshotMatcher.for_model(model_snaps).filter(navi_snaps)
 
     def cleanup_plan(self, plan):
         """
@@ -200,7 +198,7 @@ class TestCase(SnapTest):
                 self._logger.debug(
                     "removing snapshot {s} with litp".format(s=self.snap))
                 self.litp_client.remove_snapshot(self.snap)
-                plan = self.litp_client.wait_plan_completion()
+                plan = self.wait_plan_completion()
                 self.assertEqual(plan.properties['state'], 'successful')
 
         self._logger.info('Teardown: removing remaining LITP snaps')
@@ -208,14 +206,15 @@ class TestCase(SnapTest):
         all_snaps  = self.navi_get_snapshots()
         model_snaps = self.get_model_snapshots()
         filtered_snaps = self.filter_snapshot(all_snaps, model_snaps)
-        for snap in filtered_snaps:
-            if snap:
-                print "removing snapshot with navisec"
-                self.navi_delete_snapshot(snap["Name"])
+        print "removing %d snapshots with navisec" % len(filtered_snaps)
+        report = self.delete_san_snapshots(
+            [snap['Name'] for snap in filtered_snaps])
 
         # remove the previously manually created snaps
-        for snap in self.created_manual_snapshots:
-            self.navi_delete_snapshot(snap.name)
+        manual_report = self.delete_san_snapshots(
+            [snap.name for snap in self.created_manual_snapshots])
+        self.assertTrue(report, str(report))
+        self.assertTrue(manual_report, str(manual_report))
 
 
 
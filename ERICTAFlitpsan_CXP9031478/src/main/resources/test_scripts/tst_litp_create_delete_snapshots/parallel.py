@@ -0,0 +1 @@
+../common/parallel.py
\ No newline at end of file
@@ -0,0 +1 @@
+../common/pool_capacity.py
\ No newline at end of file
@@ -0,0 +1 @@
+../common/waiting.py
\ No newline at end of file